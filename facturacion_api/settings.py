@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 import whitenoise
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,7 +47,18 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "facturas.throttling.EmpresaRateThrottle",
+    ),
+}
+
+# Cubo de tokens por empresa: capacidad y recarga por minuto (overrides en LimiteEmpresa).
+# Los cubos viven en la tabla CuboTokens; la caché solo guarda los overrides leídos.
+FACTURAS_THROTTLE_RATES = {
+    "read": os.environ.get("THROTTLE_READ_RATE", "600/min"),
+    "write": os.environ.get("THROTTLE_WRITE_RATE", "120/min"),
 }
+FACTURAS_THROTTLE_CACHE = "compartida"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -80,14 +93,65 @@ WSGI_APPLICATION = "facturacion_api.wsgi.application"
 
 # Database
 # Render te da DATABASE_URL, usamos dj_database_url para leerla
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+USING_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Pool nativo de Django 5 con psycopg 3 (solo PostgreSQL). Con pool las conexiones
+# no son persistentes por worker (CONN_MAX_AGE=0): se piden y devuelven al pool.
+DB_POOL = not USING_SQLITE and os.environ.get("DB_POOL", "True") == "True"
+
 DATABASES = {
-    "default": dj_database_url.config(
-        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
-        ssl_require=True,
+    "default": dj_database_url.parse(
+        DATABASE_URL,
+        conn_max_age=0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", "600")),
+        conn_health_checks=not USING_SQLITE,
+        # SQLite no entiende sslmode
+        ssl_require=not USING_SQLITE and os.environ.get("DB_SSL_REQUIRE", "True") == "True",
     )
 }
 
+# El pool es por proceso: cada worker de gunicorn abre el suyo. Con workers síncronos un
+# request usa una sola conexión, así que por defecto el pool no pasa de GUNICORN_THREADS y
+# las conexiones totales siguen siendo ~workers × hilos, como con conexiones persistentes.
+# El worker de trabajos necesita 2 × hilos: cada trabajo en curso usa una y su latido otra a ratos.
+if DB_POOL:
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", os.environ.get("GUNICORN_THREADS", "1"))),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),  # espera máxima por una conexión
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800")),
+    }
+
+# Caché
+# "compartida" vive en disco local para que todos los workers de gunicorn vean las mismas entradas.
+# FileBasedCache no tiene operaciones atómicas (incr es get+set) y, al pasar de MAX_ENTRIES, borra
+# al azar 1/CULL_FREQUENCY de los archivos: aquí solo va lo que se puede perder sin romper nada
+# (respuestas, KPIs, límites cacheados). Los contadores que deben ser exactos viven en la BD.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "compartida": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("SHARED_CACHE_DIR", "/tmp/facturafast_cache"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("SHARED_CACHE_MAX_ENTRIES", "10000")),
+            "CULL_FREQUENCY": 10,
+        },
+    },
+}
+
+# Caché de respuestas por empresa (facturas.cache_respuestas). El TTL vale para la caché
+# compartida y para el LRU de cada proceso; la versión por empresa vive en Empresa.cache_version
+FACTURAS_RESPONSE_CACHE = "compartida"
+FACTURAS_RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+FACTURAS_RESPONSE_CACHE_LRU_SIZE = 512
+
+# Dashboard de KPIs: se sirve siempre desde caché y se recalcula con la cola de trabajos
+FACTURAS_DASHBOARD_CACHE = "compartida"
+FACTURAS_DASHBOARD_FRESH_SECONDS = int(os.environ.get("DASHBOARD_FRESH_SECONDS", "300"))
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -103,6 +167,40 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Hash de contraseñas: perfil configurable (pbkdf2 | scrypt | argon2).
+# El primero de la lista es el preferido; los demás solo verifican hashes
+# existentes, que se rehacen con el preferido en el siguiente login correcto.
+# argon2 requiere el paquete argon2-cffi: sin él fallaría cada login y registro, así que
+# preferimos que el proceso no arranque.
+PASSWORD_HASHER_PROFILE = os.environ.get("PASSWORD_HASHER_PROFILE", "pbkdf2")
+if PASSWORD_HASHER_PROFILE == "argon2" and importlib.util.find_spec("argon2") is None:
+    raise ImproperlyConfigured("PASSWORD_HASHER_PROFILE=argon2 requiere instalar argon2-cffi")
+_PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "facturas.hashers.PBKDF2PasswordHasher",
+    "scrypt": "facturas.hashers.ScryptPasswordHasher",
+    "argon2": "facturas.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for name, hasher in _PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER_PROFILE
+] + [
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+if "PASSWORD_PBKDF2_ITERATIONS" in os.environ:
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ["PASSWORD_PBKDF2_ITERATIONS"])
+if "PASSWORD_SCRYPT_WORK_FACTOR" in os.environ:
+    PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ["PASSWORD_SCRYPT_WORK_FACTOR"])
+if "PASSWORD_ARGON2_TIME_COST" in os.environ:
+    PASSWORD_ARGON2_TIME_COST = int(os.environ["PASSWORD_ARGON2_TIME_COST"])
+if "PASSWORD_ARGON2_MEMORY_COST" in os.environ:
+    PASSWORD_ARGON2_MEMORY_COST = int(os.environ["PASSWORD_ARGON2_MEMORY_COST"])
+if "PASSWORD_ARGON2_PARALLELISM" in os.environ:
+    PASSWORD_ARGON2_PARALLELISM = int(os.environ["PASSWORD_ARGON2_PARALLELISM"])
+
+# Logins fallidos: se recuerda el par email/contraseña unos segundos para no recalcular el hash
+FACTURAS_LOGIN_CACHE = "compartida"
+FACTURAS_LOGIN_NEGATIVE_TTL = int(os.environ.get("LOGIN_NEGATIVE_TTL", "30"))
+
 # Internationalization
 LANGUAGE_CODE = "es-es"
 TIME_ZONE = "America/Bogota"
@@ -117,3 +215,8 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Cola de trabajos en segundo plano (facturas.trabajos)
+# En modo eager los trabajos se ejecutan en el acto, sin worker (útil en local y tests)
+FACTURAS_TRABAJOS_EAGER = os.environ.get("FACTURAS_TRABAJOS_EAGER", "False") == "True"
+FACTURAS_TRABAJOS_VISIBILITY_TIMEOUT = int(os.environ.get("FACTURAS_TRABAJOS_VISIBILITY_TIMEOUT", "300"))
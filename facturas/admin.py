@@ -1,3 +1,153 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
-# Register your models here.
+from .models import (
+    Usuario, Empresa, LimiteEmpresa, Cliente, Producto, Factura, FacturaItem, Trabajo,
+)
+
+# -------------------------------
+# Paginador con conteo estimado
+# -------------------------------
+
+class EstimatedCountPaginator(Paginator):
+    """
+    En PostgreSQL, para listados sin filtros, usa la estimación de pg_class
+    en vez de COUNT(*) cuando la tabla es grande. Con filtros o en otros
+    motores cuenta de forma exacta.
+    """
+    exact_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = self._estimate(self.object_list)
+            if estimate is not None and estimate > self.exact_threshold:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def _estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] > 0 else None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # evita el segundo COUNT(*) sobre toda la tabla
+    list_per_page = 50
+
+# -------------------------------
+# Usuarios y empresas
+# -------------------------------
+
+@admin.register(Usuario)
+class UsuarioAdmin(UserAdmin):
+    ordering = ['email']
+    list_display = ['email', 'full_name', 'is_active', 'is_staff']
+    search_fields = ['email', 'full_name']
+    list_filter = ['is_active', 'is_staff']
+    fieldsets = (
+        (None, {'fields': ('email', 'password')}),
+        ('Datos personales', {'fields': ('full_name',)}),
+        ('Permisos', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
+        ('Fechas', {'fields': ('last_login',)}),
+    )
+    add_fieldsets = (
+        (None, {'classes': ('wide',), 'fields': ('email', 'full_name', 'password1', 'password2')}),
+    )
+
+
+@admin.register(Empresa)
+class EmpresaAdmin(admin.ModelAdmin):
+    list_display = ['company_name', 'tax_identification_number', 'user']
+    list_select_related = ['user']
+    search_fields = ['company_name', 'tax_identification_number']
+    autocomplete_fields = ['user']
+
+
+@admin.register(LimiteEmpresa)
+class LimiteEmpresaAdmin(admin.ModelAdmin):
+    list_display = ['empresa', 'read_per_minute', 'write_per_minute']
+    list_select_related = ['empresa']
+    autocomplete_fields = ['empresa']
+
+# -------------------------------
+# Clientes y productos
+# -------------------------------
+
+@admin.register(Cliente)
+class ClienteAdmin(LargeTableAdmin):
+    list_display = ['name', 'tax_identification_number', 'email', 'empresa']
+    list_select_related = ['empresa']
+    search_fields = ['name', 'tax_identification_number']
+    autocomplete_fields = ['empresa']
+
+
+@admin.register(Producto)
+class ProductoAdmin(LargeTableAdmin):
+    list_display = ['name', 'unit_price', 'vat_percentage', 'empresa']
+    list_select_related = ['empresa']
+    search_fields = ['name']
+    autocomplete_fields = ['empresa']
+
+# -------------------------------
+# Facturas
+# -------------------------------
+
+class FacturaItemInline(admin.TabularInline):
+    model = FacturaItem
+    extra = 0
+    autocomplete_fields = ['product']
+    fields = ['product', 'description', 'unit_price', 'vat_percentage', 'quantity']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product__empresa')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # El widget de autocompletar busca el producto de cada fila por su cuenta y
+        # Producto.__str__ usa la empresa: sin esto son dos consultas por ítem
+        if db_field.name == 'product':
+            kwargs['queryset'] = Producto.objects.select_related('empresa')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(Factura)
+class FacturaAdmin(LargeTableAdmin):
+    list_display = ['number', 'invoice_date', 'customer', 'empresa', 'total']
+    list_select_related = ['empresa', 'customer__empresa']
+    search_fields = ['number', 'customer__name']
+    autocomplete_fields = ['empresa', 'customer']
+    date_hierarchy = 'invoice_date'
+    readonly_fields = ['subtotal', 'total_tax', 'total', 'created_at']
+    inlines = [FacturaItemInline]
+
+
+@admin.register(FacturaItem)
+class FacturaItemAdmin(LargeTableAdmin):
+    list_display = ['id', 'invoice', 'product', 'quantity', 'unit_price', 'vat_percentage']
+    list_select_related = ['invoice__empresa', 'product__empresa']
+    search_fields = ['invoice__number', 'product__name']
+    autocomplete_fields = ['invoice', 'product']
+
+# -------------------------------
+# Infraestructura
+# -------------------------------
+
+@admin.register(Trabajo)
+class TrabajoAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'status', 'priority', 'attempts', 'run_at', 'locked_by']
+    list_filter = ['status']
+    search_fields = ['dedup_key']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+
+# -------------------------------
+# Caché negativa de logins fallidos
+# -------------------------------
+
+# Si el mismo par email/contraseña acaba de fallar, se rechaza sin volver a
+# calcular el hash. La clave es un HMAC con SECRET_KEY: la contraseña nunca
+# se guarda, ni siquiera con un hash sin sal.
+
+
+def _cache():
+    return caches[getattr(settings, 'FACTURAS_LOGIN_CACHE', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'FACTURAS_LOGIN_NEGATIVE_TTL', 30)
+
+
+def _key(email, password):
+    digest = salted_hmac('facturas.login_fallido', f"{(email or '').lower()}\0{password}").hexdigest()
+    return f"login:fallido:{digest}"
+
+
+def login_fallido_reciente(email, password):
+    if _ttl() <= 0:
+        return False
+    return _cache().get(_key(email, password)) is not None
+
+
+def registrar_login_fallido(email, password):
+    if _ttl() > 0:
+        _cache().set(_key(email, password), 1, timeout=_ttl())
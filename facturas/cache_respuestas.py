@@ -0,0 +1,147 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from rest_framework.response import Response
+
+from .models import Empresa
+
+# -------------------------------
+# Caché de respuestas versionada por empresa
+# -------------------------------
+
+# Cada empresa tiene un contador de versión (Empresa.cache_version). La clave de
+# cada respuesta incluye esa versión, así que invalidar es subir el contador:
+# las entradas viejas dejan de ser alcanzables y expiran solas. El contador
+# vive en la BD para que no se pierda con el culling de la caché y para que
+# el incremento sea atómico; se lee gratis con la empresa del usuario.
+
+
+def _shared():
+    return caches[getattr(settings, 'FACTURAS_RESPONSE_CACHE', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'FACTURAS_RESPONSE_CACHE_TTL', 300)
+
+
+class LRUCache:
+    """LRU acotado en memoria del proceso, seguro entre hilos. Las entradas caducan a los `ttl` segundos."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return None
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LRUCache(getattr(settings, 'FACTURAS_RESPONSE_CACHE_LRU_SIZE', 512), _ttl())
+stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def get_stats():
+    """Contadores de este proceso (cada worker de gunicorn lleva los suyos)."""
+    with _stats_lock:
+        data = dict(stats)
+    data['local_entries'] = len(local_cache)
+    data['scope'] = 'process'
+    data['pid'] = os.getpid()
+    return data
+
+
+def invalidar_empresa(empresa_id):
+    """Sube la versión de la empresa cuando la transacción actual confirma."""
+    def bump():
+        Empresa.objects.filter(pk=empresa_id).update(cache_version=F('cache_version') + 1)
+        _count('invalidations')
+    transaction.on_commit(bump)
+
+
+def response_key(empresa_id, version, request):
+    query = sorted(request.query_params.lists())
+    raw = f"{request.path}?{query}"
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f"respuestas:{empresa_id}:{version}:{digest}"
+
+
+# -------------------------------
+# Integración con los viewsets
+# -------------------------------
+
+class CachedReadMixin:
+    """
+    Cachea las respuestas 200 de las acciones en `cached_actions`. Primero
+    busca en el LRU del proceso, luego en la caché compartida.
+    """
+    cached_actions = ()
+
+    def _cached(self, handler, request, *args, **kwargs):
+        empresa = getattr(request.user, 'empresa', None)
+        if empresa is None or self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+
+        key = response_key(empresa.pk, empresa.cache_version, request)
+        data = local_cache.get(key)
+        if data is not None:
+            _count('local_hits')
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        data = _shared().get(key)
+        if data is not None:
+            _count('shared_hits')
+            local_cache.set(key, data)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _count('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            # Copia plana: ReturnList/ReturnDict guardan una referencia al serializer
+            data = list(response.data) if isinstance(response.data, list) else dict(response.data)
+            _shared().set(key, data, timeout=_ttl())
+            local_cache.set(key, data)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,125 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import CENT, Factura, FacturaItem
+from .trabajos import encolar, tarea
+
+# -------------------------------
+# KPIs del dashboard (stale-while-revalidate)
+# -------------------------------
+
+TOP_N = 10
+
+
+def _cache():
+    return caches[getattr(settings, 'FACTURAS_DASHBOARD_CACHE', 'default')]
+
+
+def _fresh_for():
+    return getattr(settings, 'FACTURAS_DASHBOARD_FRESH_SECONDS', 300)
+
+
+def _cache_key(empresa_id):
+    return f"dashboard:{empresa_id}"
+
+
+def _month_start():
+    today = timezone.localdate()
+    return timezone.make_aware(datetime(today.year, today.month, 1))
+
+
+def calcular_kpis(empresa_id):
+    """Tres consultas agrupadas; ninguna recorre filas en Python."""
+    top_customers = (
+        Factura.objects.filter(empresa_id=empresa_id)
+        .values('customer_id', 'customer__name')
+        .annotate(revenue=Sum('total'), invoices=Count('id'))
+        .order_by('-revenue', 'customer_id')[:TOP_N]
+    )
+    top_products = (
+        FacturaItem.objects.filter(invoice__empresa_id=empresa_id)
+        .values('product_id', 'product__name')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('-quantity', 'product_id')[:TOP_N]
+    )
+    month = Factura.objects.filter(empresa_id=empresa_id, invoice_date__gte=_month_start()).aggregate(
+        invoices=Count('id'),
+        subtotal=Sum('subtotal'),
+        total_tax=Sum('total_tax'),
+        total=Sum('total'),
+    )
+
+    def money(value):
+        # Sum() en SQLite puede devolver más decimales de la cuenta
+        return str((value or Decimal('0.00')).quantize(CENT))
+
+    return {
+        "top_customers": [
+            {
+                "id": row['customer_id'],
+                "name": row['customer__name'],
+                "revenue": money(row['revenue']),
+                "invoices": row['invoices'],
+            }
+            for row in top_customers
+        ],
+        "top_products": [
+            {"id": row['product_id'], "name": row['product__name'], "quantity": row['quantity'] or 0}
+            for row in top_products
+        ],
+        "current_month": {
+            "invoices": month['invoices'],
+            "subtotal": money(month['subtotal']),
+            "total_tax": money(month['total_tax']),
+            "total": money(month['total']),
+        },
+    }
+
+
+def refrescar(empresa_id):
+    entry = {"data": calcular_kpis(empresa_id), "computed_at": time.time()}
+    # Sin expiración: siempre preferimos servir algo viejo a recalcular en el request
+    _cache().set(_cache_key(empresa_id), entry, timeout=None)
+    return entry
+
+
+@tarea('facturas.refrescar_dashboard')
+def refrescar_dashboard(empresa_id):
+    refrescar(empresa_id)
+
+
+def encolar_refresco(empresa_id, delay=None):
+    # La clave de deduplicación agrupa ráfagas de facturas en un solo recálculo
+    return encolar(
+        'facturas.refrescar_dashboard',
+        {'empresa_id': empresa_id},
+        dedup_key=f"dashboard:{empresa_id}",
+        delay=delay if delay is not None else timedelta(seconds=5),
+    )
+
+
+def obtener_dashboard(empresa_id):
+    """
+    Devuelve los KPIs cacheados. Si están vencidos se sirven igual y se
+    encola el recálculo; solo la primera vez se calculan en el request.
+    """
+    entry = _cache().get(_cache_key(empresa_id))
+    if entry is None:
+        entry = refrescar(empresa_id)
+        stale = False
+    else:
+        stale = time.time() - entry["computed_at"] > _fresh_for()
+        if stale:
+            encolar_refresco(empresa_id, delay=timedelta(0))
+
+    return {
+        **entry["data"],
+        "computed_at": datetime.fromtimestamp(entry["computed_at"], tz=timezone.get_current_timezone()).isoformat(),
+        "stale": stale,
+    }
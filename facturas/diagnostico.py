@@ -0,0 +1,40 @@
+from django.db import connections
+
+# -------------------------------
+# Diagnóstico de conexiones a la BD
+# -------------------------------
+
+
+def estadisticas_bd():
+    """Estado de cada alias de BD en este proceso, con métricas del pool si lo hay."""
+    data = {}
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        info = {
+            "vendor": connection.vendor,
+            "conn_max_age": settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": settings_dict.get("CONN_HEALTH_CHECKS"),
+            "pooled": False,
+        }
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            stats = pool.get_stats()
+            requests = stats.get("requests_num", 0)
+            wait_ms = stats.get("requests_wait_ms", 0)
+            size = stats.get("pool_size", 0)
+            available = stats.get("pool_available", 0)
+            info.update({
+                "pooled": True,
+                "min_size": stats.get("pool_min"),
+                "max_size": stats.get("pool_max"),
+                "size": size,
+                "in_use": size - available,
+                "available": available,
+                "waiting": stats.get("requests_waiting", 0),
+                "requests": requests,
+                "wait_ms_total": wait_ms,
+                "wait_ms_avg": round(wait_ms / requests, 2) if requests else 0,
+                "timeouts": stats.get("requests_errors", 0),
+            })
+        data[connection.alias] = info
+    return data
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum, Window
+from django.db.models.expressions import RowRange
+from django.utils import timezone
+
+from .models import CENT, Factura, SaldoMensual
+
+# -------------------------------
+# Estado de cuenta por cliente
+# -------------------------------
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CURSOR_SALT = 'facturas.estado_cuenta'
+
+
+def _month_start(value):
+    local = timezone.localtime(value) if timezone.is_aware(value) else value
+    return timezone.make_aware(datetime(local.year, local.month, 1))
+
+
+def _sum_totals(customer_id, **filters):
+    total = Factura.objects.filter(customer_id=customer_id, **filters).aggregate(s=Sum('total'))['s']
+    return (total or Decimal('0.00')).quantize(CENT)
+
+
+def saldo_inicio_mes(customer_id, month_start):
+    """
+    Suma de las facturas anteriores a `month_start`. Se guarda por mes en
+    SaldoMensual y se construye a partir del último mes ya calculado, así
+    solo se suman las facturas intermedias.
+
+    Solo se guardan meses que ya empezaron: invoice_date lo pone el servidor
+    (ahora), así que una factura nueva nunca cae antes del inicio del mes en
+    curso y no puede dejar obsoleto un saldo guardado en paralelo. El saldo
+    de un mes futuro sí cambiaría con cada factura nueva: se calcula y no se guarda.
+    """
+    month = timezone.localtime(month_start).date()
+    persist = month_start <= _month_start(timezone.now())
+    cached = SaldoMensual.objects.filter(customer_id=customer_id, month=month).values_list(
+        'opening_balance', flat=True
+    ).first()
+    if cached is not None:
+        return cached
+
+    previous = (
+        SaldoMensual.objects.filter(customer_id=customer_id, month__lt=month)
+        .order_by('-month')
+        .values_list('month', 'opening_balance')
+        .first()
+    )
+    if previous:
+        prev_start = timezone.make_aware(datetime(previous[0].year, previous[0].month, 1))
+        balance = previous[1] + _sum_totals(customer_id, invoice_date__gte=prev_start, invoice_date__lt=month_start)
+    else:
+        balance = _sum_totals(customer_id, invoice_date__lt=month_start)
+
+    if not persist:
+        return balance
+    try:
+        with transaction.atomic():
+            SaldoMensual.objects.create(customer_id=customer_id, month=month, opening_balance=balance)
+    except IntegrityError:
+        pass  # otro request lo calculó a la vez
+    return balance
+
+
+def saldo_en(customer_id, moment):
+    """Saldo acumulado justo antes de `moment`."""
+    start = _month_start(moment)
+    return saldo_inicio_mes(customer_id, start) + _sum_totals(
+        customer_id, invoice_date__gte=start, invoice_date__lt=moment
+    )
+
+
+def invalidar_saldos(customer_id, desde):
+    """Borra los saldos de los meses posteriores a `desde` (un cambio en ese mes los altera)."""
+    month = timezone.localtime(desde).date() if timezone.is_aware(desde) else desde.date()
+    SaldoMensual.objects.filter(customer_id=customer_id, month__gt=month).delete()
+
+
+# -------------------------------
+# Cursor de paginación (firmado)
+# -------------------------------
+
+def _encode_cursor(invoice_date, pk, balance):
+    return signing.dumps({"d": invoice_date.isoformat(), "id": pk, "b": str(balance)}, salt=CURSOR_SALT)
+
+
+def _decode_cursor(cursor):
+    data = signing.loads(cursor, salt=CURSOR_SALT)
+    return datetime.fromisoformat(data["d"]), data["id"], Decimal(data["b"])
+
+
+# -------------------------------
+# Página del estado de cuenta
+# -------------------------------
+
+def estado_de_cuenta(customer, desde=None, hasta=None, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Devuelve una página del estado de cuenta con el saldo acumulado por
+    factura. La página se elige por keyset (invoice_date, id) usando el
+    índice (customer, invoice_date, id); el acumulado lo calcula la BD con
+    SUM() OVER sobre solo esas filas. El cursor lleva el saldo al final de la
+    página, así la siguiente no necesita volver a sumar lo anterior.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    facturas = Factura.objects.filter(customer=customer)
+    if desde is not None:
+        facturas = facturas.filter(invoice_date__gte=desde)
+    if hasta is not None:
+        facturas = facturas.filter(invoice_date__lt=hasta)
+
+    if cursor:
+        last_date, last_id, opening = _decode_cursor(cursor)
+        facturas = facturas.filter(Q(invoice_date__gt=last_date) | Q(invoice_date=last_date, id__gt=last_id))
+    elif desde is not None:
+        opening = saldo_en(customer.pk, desde)
+    else:
+        opening = Decimal('0.00')
+
+    page_ids = facturas.order_by('invoice_date', 'id').values('id')[:limit + 1]
+    rows = list(
+        Factura.objects.filter(pk__in=page_ids)
+        .annotate(
+            running=Window(
+                expression=Sum('total'),
+                order_by=[F('invoice_date').asc(), F('id').asc()],
+                frame=RowRange(start=None, end=0),
+            )
+        )
+        .order_by('invoice_date', 'id')
+        .values_list('id', 'number', 'invoice_date', 'total', 'running')
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    results = []
+    balance = opening
+    for pk, number, invoice_date, total, running in rows:
+        balance = (opening + running).quantize(CENT)
+        results.append({
+            "id": pk,
+            "number": number,
+            "invoice_date": timezone.localtime(invoice_date).isoformat(),
+            "total": str(total),
+            "balance": str(balance),
+        })
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[2], last[0], balance)
+
+    return {
+        "customer": customer.pk,
+        "opening_balance": str(opening.quantize(CENT)),
+        "closing_balance": str(balance.quantize(CENT)),
+        "results": results,
+        "next": next_cursor,
+    }
+
+
+def parse_date_param(value, end=False):
+    """'YYYY-MM-DD' → inicio de ese día (o del siguiente si `end`), en la zona local."""
+    day = datetime.strptime(value, "%Y-%m-%d")
+    if end:
+        day += timedelta(days=1)
+    return timezone.make_aware(day)
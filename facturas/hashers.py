@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# -------------------------------
+# Hashers con parámetros configurables
+# -------------------------------
+
+# Mantienen el mismo `algorithm` que los de Django, así los hashes existentes
+# siguen siendo válidos. Si cambian los parámetros, Django marca el hash como
+# desactualizado (must_update) y lo rehace en el siguiente login correcto.
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    # Requiere argon2-cffi instalado
+    time_cost = getattr(settings, 'PASSWORD_ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', hashers.Argon2PasswordHasher.parallelism)
@@ -0,0 +1,153 @@
+import codecs
+import csv
+import io
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import Cambio, Cliente, Producto
+from .cache_respuestas import invalidar_empresa
+from .serializers import ClienteSerializer, ProductoSerializer
+from .sincronizacion import registrar_cambios
+
+# -------------------------------
+# Importación masiva desde CSV
+# -------------------------------
+
+# modelo → (modelo Django, serializer de validación, campo clave del upsert)
+IMPORTADORES = {
+    Cambio.CLIENTE: (Cliente, ClienteSerializer, 'tax_identification_number'),
+    Cambio.PRODUCTO: (Producto, ProductoSerializer, 'name'),
+}
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_ERRORES_REPORTADOS = 1000
+
+
+DEFAULT_ENCODING = 'utf-8-sig'
+
+
+def abrir_csv(fileobj, encoding=DEFAULT_ENCODING):
+    """
+    Devuelve las líneas de un archivo binario (upload o disco) decodificadas
+    una a una, sin cargarlo entero. Decodificar por línea hace que un error
+    de codificación salte en la fila que lo tiene y no unas filas antes.
+    """
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    def lines():
+        for raw in fileobj:
+            yield decoder.decode(raw)
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+    return lines()
+
+
+def importar_csv(empresa, modelo, fileobj, batch_size=DEFAULT_BATCH_SIZE, encoding=DEFAULT_ENCODING):
+    """
+    Lee el CSV fila a fila, valida con las reglas del serializer del modelo y
+    hace upsert por lotes: una consulta para buscar los existentes, un
+    bulk_create para los nuevos y un bulk_update para los que ya estaban.
+
+    Si el archivo no se puede leer (codificación equivocada, CSV mal formado)
+    la importación se corta y el informe lo indica en "aborted". Los lotes
+    anteriores ya quedaron guardados; el lote en curso se descarta.
+    """
+    if modelo not in IMPORTADORES:
+        raise ValueError(f"Modelo no soportado: {modelo}")
+    model, serializer_class, key = IMPORTADORES[modelo]
+
+    report = {"created": 0, "updated": 0, "error_count": 0, "errors": []}
+    batch = []
+    committed_through = 1
+    reader = csv.DictReader(abrir_csv(fileobj, encoding))
+
+    try:
+        header = reader.fieldnames or []
+        validator = serializer_class()
+        writable = [
+            name for name, field in validator.fields.items()
+            if not field.read_only and name in header
+        ]
+        # Una celda vacía en un campo que no es texto (precio, IVA...) cuenta como
+        # "no viene": así aplican los valores por defecto del serializer y del modelo
+        text_fields = {name for name in writable if isinstance(validator.fields[name], serializers.CharField)}
+        if 'name' not in header:
+            raise serializers.ValidationError({"file": "El CSV debe incluir la columna 'name'"})
+
+        # La fila 1 es la cabecera; los datos empiezan en la 2
+        for line, row in enumerate(reader, start=2):
+            data = {}
+            for name in writable:
+                value = (row.get(name) or '').strip()
+                if value or name in text_fields:
+                    data[name] = value
+            try:
+                batch.append((line, validator.run_validation(data)))
+            except serializers.ValidationError as e:
+                report["error_count"] += 1
+                if len(report["errors"]) < MAX_ERRORES_REPORTADOS:
+                    report["errors"].append({"row": line, "errors": e.detail})
+
+            if len(batch) >= batch_size:
+                _upsert(modelo, model, empresa, key, writable, batch, report)
+                committed_through = line
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        # line_num cuenta las líneas ya leídas; la de un error de decodificación es la siguiente
+        failed = reader.line_num + 1 if isinstance(e, UnicodeDecodeError) else reader.line_num
+        report["aborted"] = {
+            "row": failed,
+            "detail": f"No se pudo leer el archivo ({encoding}): {e}",
+            "committed_through_row": committed_through,
+        }
+        return report
+
+    if batch:
+        _upsert(modelo, model, empresa, key, writable, batch, report)
+    return report
+
+
+def _upsert(modelo, model, empresa, key, fields, batch, report):
+    # Filas repetidas dentro del lote: gana la última. Sin clave → siempre se crean
+    keyed = {}
+    unkeyed = []
+    for _line, attrs in batch:
+        value = attrs.get(key) or ''
+        if value:
+            keyed[value] = attrs
+        else:
+            unkeyed.append(attrs)
+
+    existing = {}
+    if keyed:
+        for obj in model.objects.filter(empresa=empresa, **{f"{key}__in": list(keyed)}).order_by('-id'):
+            existing[getattr(obj, key)] = obj  # si hay duplicados se queda el más antiguo
+
+    to_create = [model(empresa=empresa, **attrs) for attrs in unkeyed]
+    to_update = []
+    for value, attrs in keyed.items():
+        obj = existing.get(value)
+        if obj is None:
+            to_create.append(model(empresa=empresa, **attrs))
+            continue
+        for name in fields:
+            if name in attrs:
+                setattr(obj, name, attrs[name])
+        to_update.append(obj)
+
+    with transaction.atomic():
+        if to_create:
+            model.objects.bulk_create(to_create)
+        update_fields = [name for name in fields if name != key]
+        if to_update and update_fields:
+            model.objects.bulk_update(to_update, update_fields, batch_size=500)
+        # bulk_create/bulk_update no disparan señales: avisamos al feed a mano
+        registrar_cambios(empresa.pk, modelo, [obj.pk for obj in to_create + to_update])
+        invalidar_empresa(empresa.pk)
+
+    report["created"] += len(to_create)
+    report["updated"] += len(to_update)
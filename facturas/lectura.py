@@ -0,0 +1,255 @@
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PKOnlyObject, RelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# -------------------------------
+# Lectura rápida basada en values_list()
+# -------------------------------
+
+IN_CHUNK = 900  # máximo de ids por consulta IN (límite de variables de SQLite)
+
+VALUE, PK, ONE, MANY = range(4)
+
+
+def _identity(value):
+    return value
+
+
+def _mapper(field):
+    """
+    Conversor equivalente a field.to_representation. Para los tipos comunes
+    se usa una versión especializada; el resto delega en el propio campo.
+    """
+    method = type(field).to_representation
+    if method is serializers.CharField.to_representation:
+        return str
+    if method is serializers.IntegerField.to_representation:
+        return int
+
+    if method is serializers.DateTimeField.to_representation:
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        def datetime_mapper(value):
+            # La zona se resuelve en cada fila: el lector se reutiliza entre requests
+            tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if tz is None or not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return datetime_mapper
+
+    if method is serializers.DecimalField.to_representation:
+        coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce or field.localize or field.normalize_output or field.decimal_places is None:
+            return field.to_representation
+        exponent = -field.decimal_places
+
+        def decimal_mapper(value):
+            # Lo que viene de la BD ya tiene la escala del campo: no hace falta cuantizar
+            if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+                return f'{value:f}'
+            return field.to_representation(value)
+        return decimal_mapper
+
+    return field.to_representation
+
+
+class ValuesReader:
+    """
+    Compila un ModelSerializer a una lista de (campo, columna, conversor) y
+    construye las filas directamente desde tuplas de values_list(). Los
+    conversores equivalen a los to_representation() de los propios campos
+    del serializer, así la salida es idéntica. Los anidados se resuelven con una
+    consulta por relación y se unen por id con diccionarios.
+    """
+
+    def __init__(self, serializer_class, context=None):
+        serializer = serializer_class(context=context or {})
+        self.model = serializer.Meta.model
+        self.columns = [self.model._meta.pk.attname]
+        self.plan = []
+
+        for field in serializer._readable_fields:
+            source = field.source
+            try:
+                model_field = self.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                if hasattr(self.model, source):
+                    raise ValueError(f"{serializer_class.__name__}.{field.field_name}: fuente no soportada")
+                # DRF omite el campo cuando el atributo no existe y no es obligatorio
+                if field.required:
+                    raise ValueError(f"{serializer_class.__name__}.{field.field_name}: fuente inexistente")
+                continue
+
+            if isinstance(field, serializers.ListSerializer) and model_field.one_to_many:
+                child = ValuesReader(type(field.child), context)
+                fk = model_field.field.attname
+                if fk not in child.columns:
+                    child.columns.append(fk)
+                self.plan.append((MANY, field.field_name, (fk, child)))
+            elif isinstance(field, serializers.BaseSerializer) and model_field.many_to_one:
+                self.plan.append((ONE, field.field_name, (self._column(model_field.attname), ValuesReader(type(field), context))))
+            elif isinstance(field, RelatedField) and model_field.many_to_one:
+                if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                    # PrimaryKeyRelatedField sin pk_field devuelve el id tal cual
+                    self.plan.append((VALUE, field.field_name, (self._column(model_field.attname), _identity)))
+                else:
+                    self.plan.append((PK, field.field_name, (self._column(model_field.attname), field.to_representation)))
+            elif model_field.concrete and not model_field.is_relation:
+                self.plan.append((VALUE, field.field_name, (self._column(model_field.attname), _mapper(field))))
+            else:
+                raise ValueError(f"{serializer_class.__name__}.{field.field_name}: campo no soportado")
+
+    def _column(self, attname):
+        if attname not in self.columns:
+            self.columns.append(attname)
+        return self.columns.index(attname)
+
+    # -- lectura --
+
+    def rows(self, queryset):
+        return list(queryset.values_list(*self.columns))
+
+    def serialize(self, queryset):
+        return self.render(self.rows(queryset))
+
+    def render(self, rows):
+        nested = {}
+        for kind, name, (column, reader) in self.plan:
+            if kind == ONE:
+                ids = {row[column] for row in rows if row[column] is not None}
+                nested[name] = reader.by_pk(ids)
+            elif kind == MANY:
+                nested[name] = reader.by_fk(column, [row[0] for row in rows])
+
+        result = []
+        for row in rows:
+            item = {}
+            for kind, name, (column, func) in self.plan:
+                if kind == MANY:
+                    item[name] = nested[name].get(row[0], [])
+                    continue
+                value = row[column]
+                if value is None:
+                    item[name] = None
+                elif kind == VALUE:
+                    item[name] = func(value)
+                elif kind == PK:
+                    item[name] = func(PKOnlyObject(pk=value))
+                else:
+                    item[name] = nested[name][value]
+            result.append(item)
+        return result
+
+    def by_pk(self, ids):
+        ids = list(ids)
+        out = {}
+        for start in range(0, len(ids), IN_CHUNK):
+            rows = self.rows(self.model.objects.filter(pk__in=ids[start:start + IN_CHUNK]))
+            for row, data in zip(rows, self.render(rows)):
+                out[row[0]] = data
+        return out
+
+    def by_fk(self, fk, parent_ids):
+        column = self.columns.index(fk)
+        out = {}
+        for start in range(0, len(parent_ids), IN_CHUNK):
+            rows = self.rows(self.model.objects.filter(**{f"{fk}__in": parent_ids[start:start + IN_CHUNK]}))
+            for row, data in zip(rows, self.render(rows)):
+                out.setdefault(row[column], []).append(data)
+        return out
+
+
+_readers = {}
+
+
+def get_reader(serializer_class):
+    """
+    ValuesReader compilado una sola vez por clase de serializer. Se compila sin
+    contexto: los campos que soporta no dependen del request.
+    """
+    reader = _readers.get(serializer_class)
+    if reader is None:
+        reader = _readers[serializer_class] = ValuesReader(serializer_class)
+    return reader
+
+
+# -------------------------------
+# Integración con los viewsets
+# -------------------------------
+
+class FastReadMixin:
+    """
+    Con `fast_read = True` el listado (sin paginación) se arma con
+    ValuesReader en vez de instanciar el serializer por fila.
+    """
+    fast_read = False
+
+    def get_values_reader(self):
+        return get_reader(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_read or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(self.get_values_reader().serialize(queryset))
+
+
+# -------------------------------
+# Listados en streaming (?stream=1)
+# -------------------------------
+
+class StreamingListMixin:
+    """
+    Con `?stream=1` el listado se envía como un único array JSON generado por
+    trozos: se recorre el queryset con .iterator(), se serializa cada trozo y
+    se escribe al vuelo, así la memoria del worker no depende del tamaño.
+    """
+    stream_chunk_size = 500
+
+    def get_stream_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_stream_queryset()
+        response = StreamingHttpResponse(self._stream_json(queryset), content_type='application/json')
+        response['X-Accel-Buffering'] = 'no'  # que el proxy no acumule la respuesta
+        return response
+
+    def _stream_json(self, queryset):
+        renderer = JSONRenderer()
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+
+        yield b'['
+        first = True
+        chunk = []
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= self.stream_chunk_size:
+                yield self._render_chunk(renderer, serializer_class, context, chunk, first)
+                first = False
+                chunk = []
+        if chunk:
+            yield self._render_chunk(renderer, serializer_class, context, chunk, first)
+        yield b']'
+
+    @staticmethod
+    def _render_chunk(renderer, serializer_class, context, chunk, first):
+        # El render de una lista es "[a,b]": quitamos los corchetes y encadenamos
+        body = renderer.render(serializer_class(chunk, many=True, context=context).data)[1:-1]
+        return body if first else b',' + body
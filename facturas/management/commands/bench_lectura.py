@@ -0,0 +1,67 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from facturas.lectura import get_reader
+from facturas.models import Cliente, Empresa, Factura, Producto, Usuario
+from facturas.serializers import ClienteSerializer, FacturaSerializer, ProductoSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compara el serializer estándar con ValuesReader en listados grandes (los datos se descartan al final)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options["rows"], options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, rows, repeat):
+        user = Usuario.objects.create_user("bench@facturafast.local", "Bench", None)
+        empresa = Empresa.objects.create(user=user, company_name="Bench")
+        clientes = Cliente.objects.bulk_create(
+            Cliente(empresa=empresa, name=f"Cliente {i}", tax_identification_number=str(i)) for i in range(max(1, rows // 10))
+        )
+        Producto.objects.bulk_create(
+            Producto(empresa=empresa, name=f"Producto {i}", unit_price=Decimal("9.99")) for i in range(rows)
+        )
+        Factura.objects.bulk_create(
+            Factura(empresa=empresa, customer=clientes[i % len(clientes)], number=f"FAC-{i:06d}") for i in range(rows)
+        )
+
+        renderer = JSONRenderer()
+        for label, serializer_class, queryset in [
+            ("clientes", ClienteSerializer, Cliente.objects.filter(empresa=empresa)),
+            ("productos", ProductoSerializer, Producto.objects.filter(empresa=empresa)),
+            ("facturas", FacturaSerializer, Factura.objects.filter(empresa=empresa).select_related("customer")),
+        ]:
+            slow, slow_bytes = self._time(repeat, lambda: renderer.render(serializer_class(queryset, many=True).data))
+            fast, fast_bytes = self._time(repeat, lambda: renderer.render(get_reader(serializer_class).serialize(queryset)))
+            if slow_bytes != fast_bytes:
+                raise CommandError(f"La salida de {label} no coincide con el serializer estándar")
+            self.stdout.write(
+                f"{label}: {queryset.count()} filas | serializer {slow * 1000:.0f} ms | values {fast * 1000:.0f} ms | x{slow / fast:.1f}"
+            )
+
+    @staticmethod
+    def _time(repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from facturas.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+PERFILES = {
+    "pbkdf2": PBKDF2PasswordHasher,
+    "scrypt": ScryptPasswordHasher,
+    "argon2": Argon2PasswordHasher,
+}
+
+
+class Command(BaseCommand):
+    help = "Mide verificaciones de contraseña por segundo (un núcleo) con cada perfil de hash configurado"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--profile", choices=sorted(PERFILES), action="append")
+
+    def handle(self, *args, **options):
+        for name in options["profile"] or sorted(PERFILES):
+            hasher = PERFILES[name]()
+            try:
+                encoded = hasher.encode("bench-password", hasher.salt())
+            except ValueError as exc:
+                # p. ej. argon2 sin argon2-cffi instalado
+                self.stdout.write(f"{name}: no disponible ({exc})")
+                continue
+
+            start = time.perf_counter()
+            for _ in range(options["repeat"]):
+                hasher.verify("bench-password", encoded)
+            elapsed = (time.perf_counter() - start) / options["repeat"]
+            self.stdout.write(
+                f"{name}: {elapsed * 1000:.1f} ms por login | {1 / elapsed:.1f} logins/s por núcleo | {hasher.safe_summary(encoded)}"
+            )
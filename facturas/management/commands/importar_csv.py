@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from facturas.importacion import DEFAULT_BATCH_SIZE, DEFAULT_ENCODING, IMPORTADORES, importar_csv
+from facturas.models import Empresa
+
+
+class Command(BaseCommand):
+    help = "Importa clientes o productos de una empresa desde un archivo CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("modelo", choices=sorted(IMPORTADORES))
+        parser.add_argument("archivo", help="Ruta del CSV (con cabecera)")
+        parser.add_argument("--empresa", type=int, required=True, help="ID de la empresa destino")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--encoding", default=DEFAULT_ENCODING, help="Codificación del archivo (p. ej. cp1252 para Excel)")
+
+    def handle(self, *args, **options):
+        try:
+            empresa = Empresa.objects.get(pk=options["empresa"])
+        except Empresa.DoesNotExist:
+            raise CommandError(f"No existe la empresa {options['empresa']}")
+
+        with open(options["archivo"], "rb") as fh:
+            report = importar_csv(
+                empresa, options["modelo"], fh, batch_size=options["batch_size"], encoding=options["encoding"]
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(f"Fila {error['row']}: {error['errors']}")
+        if "aborted" in report:
+            aborted = report["aborted"]
+            raise CommandError(
+                f"Fila {aborted['row']}: {aborted['detail']}. Quedaron guardadas las filas hasta la "
+                f"{aborted['committed_through_row']} ({report['created']} creados, {report['updated']} actualizados)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['created']} creados, {report['updated']} actualizados, "
+            f"{report['error_count']} filas con errores"
+        ))
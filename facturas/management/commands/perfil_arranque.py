@@ -0,0 +1,48 @@
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+STARTUP_CODE = (
+    "import os, django;"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'facturacion_api.settings');"
+    "import facturacion_api.wsgi;"
+    "from facturas.warmup import calentar_codigo; calentar_codigo()"
+)
+
+
+class Command(BaseCommand):
+    help = "Mide el arranque de un worker (python -X importtime) y muestra los módulos más lentos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--sort", choices=["self", "cumulative"], default="cumulative")
+
+    def handle(self, *args, **options):
+        # Proceso nuevo: en este ya está todo importado
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(proc.stderr[-2000:])
+
+        rows = []
+        for line in proc.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                rows.append((int(self_us), int(cumulative_us), len(indent) // 2, module))
+        if not rows:
+            raise CommandError("No se obtuvo salida de -X importtime")
+
+        total_ms = sum(row[0] for row in rows) / 1000
+        key = 0 if options["sort"] == "self" else 1
+        self.stdout.write(f"⏱️ Importaciones: {len(rows)} módulos, {total_ms:.0f} ms en total")
+        self.stdout.write(f"{'self ms':>9} {'acum ms':>9}  módulo")
+        for self_us, cumulative_us, _depth, module in sorted(rows, key=lambda r: r[key], reverse=True)[:options["top"]]:
+            self.stdout.write(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module}")
@@ -0,0 +1,64 @@
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from facturas.trabajos import ejecutar, reclamar
+
+
+def _ejecutar_en_hilo(trabajo):
+    try:
+        return ejecutar(trabajo)
+    finally:
+        # Cada hilo tiene su propia conexión; la cerramos al terminar
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Procesa los trabajos en segundo plano guardados en la base de datos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Hilos de ejecución")
+        parser.add_argument("--poll", type=float, default=1.0, help="Segundos de espera cuando no hay trabajos")
+        parser.add_argument("--once", action="store_true", help="Vacía la cola y termina")
+
+    def handle(self, *args, **options):
+        threads = max(1, options["threads"])
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        self.stdout.write(f"⚙️ Worker iniciado con {threads} hilos")
+        done = failed = 0
+        # Con un solo hilo se ejecuta en línea (SQLite no tolera bien escrituras concurrentes)
+        pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+        run = pool.map if pool else map
+        try:
+            while not self._stop:
+                trabajos = reclamar(limit=threads)
+                if not trabajos:
+                    if options["once"]:
+                        break
+                    close_old_connections()
+                    time.sleep(options["poll"])
+                    continue
+
+                if pool:
+                    # Los trabajos corren en otros hilos: este no debe retener su conexión mientras
+                    # tanto, o el pool necesitaría una más que hilos × 2 (trabajo + latido)
+                    connection.close()
+                for ok in run(_ejecutar_en_hilo if pool else ejecutar, trabajos):
+                    if ok:
+                        done += 1
+                    else:
+                        failed += 1
+        finally:
+            if pool:
+                pool.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Worker detenido: {done} terminados, {failed} fallidos"))
+
+    def _handle_stop(self, signum, frame):
+        self._stop = True
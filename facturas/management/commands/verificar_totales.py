@@ -0,0 +1,73 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from facturas.models import Factura, FacturaItem, line_amounts, round_tax, totales_actualizados
+
+
+class Command(BaseCommand):
+    help = "Detecta (y con --fix repara) facturas cuyos totales no cuadran con sus ítems"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Corrige los totales descuadrados")
+        parser.add_argument("--empresa", type=int, help="Limita la revisión a una empresa")
+        parser.add_argument("--desde", help="Solo facturas con fecha desde YYYY-MM-DD (deja fuera las ya emitidas)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        facturas = Factura.objects.order_by("pk")
+        if options["empresa"]:
+            facturas = facturas.filter(empresa_id=options["empresa"])
+        if options["desde"]:
+            try:
+                desde = timezone.make_aware(datetime.strptime(options["desde"], "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("--desde debe tener el formato YYYY-MM-DD")
+            facturas = facturas.filter(invoice_date__gte=desde)
+
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                facturas.filter(pk__gt=last_pk).values_list(
+                    "pk", "subtotal", "total_tax", "total", "total_tax_exact"
+                )[:options["chunk_size"]]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+
+            expected = {pk: [Decimal("0.00"), Decimal("0.00")] for pk, *_ in chunk}
+            items = FacturaItem.objects.filter(invoice_id__in=expected).values_list(
+                "invoice_id", "unit_price", "quantity", "vat_percentage"
+            )
+            for invoice_id, unit_price, quantity, vat_percentage in items:
+                line_ex, line_tax = line_amounts(unit_price, quantity, vat_percentage)
+                expected[invoice_id][0] += line_ex
+                expected[invoice_id][1] += line_tax
+
+            to_fix = []
+            for pk, subtotal, total_tax, total, total_tax_exact in chunk:
+                checked += 1
+                exp_sub, exp_exact = expected[pk]
+                # El IVA se redondea una vez sobre la suma exacta, igual que en los deltas
+                exp_tax = round_tax(exp_exact)
+                if (subtotal, total_tax, total, total_tax_exact) == (exp_sub, exp_tax, exp_sub + exp_tax, exp_exact):
+                    continue
+                drifted += 1
+                self.stdout.write(
+                    f"⚠️ Factura {pk}: guardado {subtotal}/{total_tax}/{total}, "
+                    f"esperado {exp_sub}/{exp_tax}/{exp_sub + exp_tax}"
+                )
+                to_fix.append(Factura(
+                    pk=pk, subtotal=exp_sub, total_tax=exp_tax, total=exp_sub + exp_tax, total_tax_exact=exp_exact
+                ))
+
+            if options["fix"] and to_fix:
+                Factura.objects.bulk_update(to_fix, ["subtotal", "total_tax", "total", "total_tax_exact"])
+                totales_actualizados.send(sender=Factura, factura_ids=[f.pk for f in to_fix])
+
+        action = "corregidas" if options["fix"] else "con descuadre"
+        self.stdout.write(self.style.SUCCESS(f"✅ {checked} facturas revisadas, {drifted} {action}"))
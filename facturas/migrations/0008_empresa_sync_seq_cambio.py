@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0007_trabajo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='sync_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('model', models.CharField(choices=[('clientes', 'Cliente'), ('productos', 'Producto'), ('facturas', 'Factura')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios', to='facturas.empresa')),
+            ],
+            options={
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['empresa', 'seq'], name='cambio_empresa_seq_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'model', 'object_id'), name='unique_cambio_por_objeto')],
+            },
+        ),
+    ]
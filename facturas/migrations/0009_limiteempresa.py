@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0008_empresa_sync_seq_cambio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LimiteEmpresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_per_minute', models.PositiveIntegerField(blank=True, null=True)),
+                ('write_per_minute', models.PositiveIntegerField(blank=True, null=True)),
+                ('empresa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='limite', to='facturas.empresa')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0009_limiteempresa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['invoice_date'], name='factura_invoice_date_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0010_factura_invoice_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('opening_balance', models.DecimalField(decimal_places=2, max_digits=16)),
+            ],
+            options={
+                'ordering': ['customer', 'month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['customer', 'invoice_date', 'id'], name='factura_customer_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='saldomensual',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_mensuales', to='facturas.cliente'),
+        ),
+        migrations.AddConstraint(
+            model_name='saldomensual',
+            constraint=models.UniqueConstraint(fields=('customer', 'month'), name='unique_saldo_mensual'),
+        ),
+    ]
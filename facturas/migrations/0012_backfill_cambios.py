@@ -0,0 +1,55 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Orden del feed: primero clientes y productos, luego las facturas que los usan
+MODELOS = [
+    ('clientes', 'Cliente'),
+    ('productos', 'Producto'),
+    ('facturas', 'Factura'),
+]
+
+
+def sembrar_cambios(apps, schema_editor):
+    """
+    Da una entrada del feed a cada objeto que existía antes de 0008, para que
+    un dispositivo nuevo reciba el catálogo completo con ?since=0. Los objetos
+    que ya tienen Cambio se saltan, así que se puede ejecutar sobre una base
+    que ya estaba en producción con 0008 aplicada.
+    """
+    Empresa = apps.get_model('facturas', 'Empresa')
+    Cambio = apps.get_model('facturas', 'Cambio')
+
+    for empresa_id, seq in list(Empresa.objects.order_by('pk').values_list('pk', 'sync_seq')):
+        start = seq
+        for name, model_name in MODELOS:
+            model = apps.get_model('facturas', model_name)
+            registrados = Cambio.objects.filter(empresa_id=empresa_id, model=name).values('object_id')
+            ids = (
+                model.objects.filter(empresa_id=empresa_id)
+                .exclude(pk__in=registrados)
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            batch = []
+            for pk in ids.iterator(chunk_size=BATCH_SIZE):
+                seq += 1
+                batch.append(Cambio(empresa_id=empresa_id, model=name, object_id=pk, seq=seq))
+                if len(batch) >= BATCH_SIZE:
+                    Cambio.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                Cambio.objects.bulk_create(batch)
+        if seq != start:
+            Empresa.objects.filter(pk=empresa_id).update(sync_seq=seq)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0011_estado_cuenta'),
+    ]
+
+    operations = [
+        migrations.RunPython(sembrar_cambios, migrations.RunPython.noop),
+    ]
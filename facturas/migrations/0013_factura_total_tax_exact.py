@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:25
+
+from decimal import Decimal
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def calcular_iva_exacto(apps, schema_editor):
+    """
+    Rellena total_tax_exact con la suma sin redondear del IVA de los ítems.
+    No toca subtotal/total_tax/total: las facturas ya emitidas conservan sus
+    totales y los próximos deltas parten de este valor.
+    """
+    Factura = apps.get_model('facturas', 'Factura')
+    FacturaItem = apps.get_model('facturas', 'FacturaItem')
+
+    last_pk = 0
+    while True:
+        ids = list(
+            Factura.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        last_pk = ids[-1]
+
+        exact = dict.fromkeys(ids, Decimal('0'))
+        items = FacturaItem.objects.filter(invoice_id__in=ids).values_list(
+            'invoice_id', 'unit_price', 'quantity', 'vat_percentage'
+        )
+        for invoice_id, unit_price, quantity, vat_percentage in items:
+            if unit_price is None or vat_percentage is None or not quantity:
+                continue
+            exact[invoice_id] += unit_price * quantity * vat_percentage / Decimal('100.00')
+
+        Factura.objects.bulk_update(
+            [Factura(pk=pk, total_tax_exact=value) for pk, value in exact.items() if value],
+            ['total_tax_exact'],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0012_backfill_cambios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factura',
+            name='total_tax_exact',
+            field=models.DecimalField(decimal_places=6, default=Decimal('0'), editable=False, max_digits=20),
+        ),
+        migrations.RunPython(calcular_iva_exacto, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0013_factura_total_tax_exact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuboTokens',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=10)),
+                ('tokens', models.FloatField()),
+                ('refilled_at', models.FloatField()),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cubos_tokens', to='facturas.empresa')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'scope'), name='unique_cubo_tokens_por_scope')],
+            },
+        ),
+    ]
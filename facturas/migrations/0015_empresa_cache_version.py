@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:31
+
+import time
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0014_cubotokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='cache_version',
+            field=models.BigIntegerField(default=time.time_ns, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def borrar_saldos_futuros(apps, schema_editor):
+    """Los saldos de meses que aún no empiezan ya no se guardan; se descartan los existentes."""
+    SaldoMensual = apps.get_model('facturas', 'SaldoMensual')
+    SaldoMensual.objects.filter(month__gt=timezone.localdate().replace(day=1)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0015_empresa_cache_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(borrar_saldos_futuros, migrations.RunPython.noop),
+    ]
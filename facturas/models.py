@@ -1,10 +1,18 @@
+import time
+from collections import defaultdict
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
-from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.dispatch import Signal
+from decimal import Decimal, ROUND_HALF_UP
 from django.conf import settings
 from django.utils import timezone
 
 DEFAULT_VAT = Decimal('19.00')
+CENT = Decimal('0.01')
+
+# Se envía con `factura_ids` cuando los totales cambian por UPDATE directo (sin post_save)
+totales_actualizados = Signal()
 
 # -------------------------------
 # Usuario personalizado
@@ -53,10 +61,53 @@ class Empresa(models.Model):
     phone_number = models.CharField(max_length=50, blank=True)
     email = models.EmailField(blank=True)
     website_link = models.URLField(blank=True)
+    sync_seq = models.BigIntegerField(default=0, editable=False)  # última secuencia del feed de cambios
+    # Versión de la caché de respuestas; arranca en un valor que no se repite entre bases de datos
+    cache_version = models.BigIntegerField(default=time.time_ns, editable=False)
+
+    # Contadores que solo se cambian con UPDATE ... F() + n
+    COUNTER_FIELDS = ('sync_seq', 'cache_version')
 
     def __str__(self):
         return self.company_name
 
+    def save(self, *args, **kwargs):
+        # Una instancia cargada antes de un incremento no debe devolver los contadores atrás
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+# -------------------------------
+# Límites de peticiones por empresa (overrides del throttle)
+# -------------------------------
+
+class LimiteEmpresa(models.Model):
+    empresa = models.OneToOneField(Empresa, on_delete=models.CASCADE, related_name='limite')
+    read_per_minute = models.PositiveIntegerField(blank=True, null=True)  # vacío = valor por defecto
+    write_per_minute = models.PositiveIntegerField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Límites de {self.empresa.company_name}"
+
+
+class CuboTokens(models.Model):
+    """Estado del throttle de una empresa por tipo de operación. Se consume con un UPDATE condicional."""
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='cubos_tokens')
+    scope = models.CharField(max_length=10)  # 'read' | 'write'
+    tokens = models.FloatField()
+    refilled_at = models.FloatField()  # epoch en segundos de la última recarga
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'scope'], name='unique_cubo_tokens_por_scope')
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.empresa_id}: {self.tokens:.1f}"
+
 # -------------------------------
 # Cliente
 # -------------------------------
@@ -107,10 +158,18 @@ class Factura(models.Model):
     subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
     total_tax = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
     total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    # IVA sin redondear (suma exacta de las líneas); total_tax es este valor redondeado a centavos
+    total_tax_exact = models.DecimalField(max_digits=20, decimal_places=6, default=Decimal('0'), editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-invoice_date', '-id']
+        indexes = [
+            # date_hierarchy del admin y listados por fecha
+            models.Index(fields=['invoice_date'], name='factura_invoice_date_idx'),
+            # Estado de cuenta por cliente (paginación por (invoice_date, id))
+            models.Index(fields=['customer', 'invoice_date', 'id'], name='factura_customer_date_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(fields=['empresa', 'number'], name='unique_invoice_number_per_empresa')
         ]
@@ -132,18 +191,162 @@ class Factura(models.Model):
         super().save(*args, **kwargs)
 
     def recalculate_totals(self):
-        items = self.items.all()
         subtotal = Decimal('0.00')
         total_tax = Decimal('0.00')
-        for it in items:
-            line_ex = (it.unit_price * it.quantity)
-            line_tax = (line_ex * (it.vat_percentage / Decimal('100.00')))
+        for unit_price, quantity, vat_percentage in self.items.values_list('unit_price', 'quantity', 'vat_percentage'):
+            line_ex, line_tax = line_amounts(unit_price, quantity, vat_percentage)
             subtotal += line_ex
             total_tax += line_tax
         self.subtotal = subtotal
-        self.total_tax = total_tax
-        self.total = subtotal + total_tax
-        self.save(update_fields=['subtotal', 'total_tax', 'total'])
+        self.total_tax_exact = total_tax
+        self.total_tax = round_tax(total_tax)
+        self.total = subtotal + self.total_tax
+        self.save(update_fields=['subtotal', 'total_tax_exact', 'total_tax', 'total'])
+
+# -------------------------------
+# Totales por deltas
+# -------------------------------
+
+def line_amounts(unit_price, quantity, vat_percentage):
+    """(base, IVA) de una línea, sin redondear: el IVA de la factura se redondea
+    una sola vez sobre la suma, como siempre se ha hecho (ver round_tax)."""
+    if unit_price is None or vat_percentage is None or not quantity:
+        return Decimal('0.00'), Decimal('0.00')
+    line_ex = unit_price * quantity
+    line_tax = line_ex * vat_percentage / Decimal('100.00')
+    return line_ex, line_tax
+
+
+def round_tax(total_tax_exact):
+    # Mismo redondeo que aplicaba PostgreSQL al guardar el total sin redondear (mitad hacia arriba)
+    return total_tax_exact.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def apply_totals_deltas(deltas):
+    """
+    Suma {factura_id: (Δsubtotal, Δiva)} sin releer ítems. El IVA exacto se
+    acumula en total_tax_exact y total_tax se vuelve a redondear desde ahí,
+    así el resultado es el mismo que el de un recálculo completo. Se bloquea
+    la fila de la factura para leer el IVA exacto y escribirlo sin carreras.
+    """
+    pending = [(factura_id, d) for factura_id, d in sorted(deltas.items()) if d[0] or d[1]]
+    if not pending:
+        return
+    changed = []
+    with transaction.atomic():
+        for factura_id, (d_sub, d_tax) in pending:
+            exact = Factura.objects.select_for_update().filter(pk=factura_id).values_list(
+                'total_tax_exact', flat=True
+            ).first()
+            if exact is None:
+                continue
+            exact += d_tax
+            total_tax = round_tax(exact)
+            Factura.objects.filter(pk=factura_id).update(
+                subtotal=F('subtotal') + d_sub,
+                total_tax_exact=exact,
+                total_tax=total_tax,
+                total=F('subtotal') + d_sub + total_tax,
+            )
+            changed.append(factura_id)
+    if changed:
+        totales_actualizados.send(sender=Factura, factura_ids=changed)
+
+
+def _accumulate(deltas, rows, sign=1):
+    # rows: (invoice_id, unit_price, quantity, vat_percentage)
+    for invoice_id, unit_price, quantity, vat_percentage in rows:
+        line_ex, line_tax = line_amounts(unit_price, quantity, vat_percentage)
+        d_sub, d_tax = deltas[invoice_id]
+        deltas[invoice_id] = (d_sub + sign * line_ex, d_tax + sign * line_tax)
+    return deltas
+
+
+def _new_deltas():
+    return defaultdict(lambda: (Decimal('0.00'), Decimal('0.00')))
+
+
+AMOUNT_FIELDS = ('invoice_id', 'unit_price', 'quantity', 'vat_percentage')
+
+
+class FacturaItemQuerySet(models.QuerySet):
+    """Las operaciones masivas ajustan los totales de las facturas afectadas.
+    bulk_update() pasa por update(), así que también queda cubierto."""
+
+    def _amount_rows(self):
+        return list(self.values_list(*AMOUNT_FIELDS))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.fill_defaults()
+        if not (kwargs.get('update_conflicts') or kwargs.get('ignore_conflicts')):
+            with transaction.atomic(using=self.db):
+                created = super().bulk_create(objs, *args, **kwargs)
+                apply_totals_deltas(_accumulate(_new_deltas(), (obj.amounts() for obj in objs)))
+            return created
+
+        # Con conflictos una fila puede existir ya (se actualiza o se ignora): se
+        # leen las filas en conflicto antes y después para sumar solo el cambio real
+        unique = [
+            self.model._meta.get_field(name).attname
+            for name in (kwargs.get('unique_fields') or [self.model._meta.pk.name])
+        ]
+        lookup = Q(pk__in=[])
+        fresh = []
+        for obj in objs:
+            values = {name: getattr(obj, name) for name in unique}
+            if None in values.values():
+                fresh.append(obj.amounts())
+            else:
+                lookup |= Q(**values)
+        with transaction.atomic(using=self.db):
+            before = self.model.objects.select_for_update().filter(lookup)._amount_rows()
+            created = super().bulk_create(objs, *args, **kwargs)
+            after = self.model.objects.filter(lookup)._amount_rows()
+            deltas = _accumulate(_accumulate(_new_deltas(), before, -1), after)
+            apply_totals_deltas(_accumulate(deltas, fresh))
+        return created
+
+    def update(self, **kwargs):
+        if not set(kwargs) & {'invoice', 'invoice_id', 'unit_price', 'quantity', 'vat_percentage'}:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            before = self.model.objects.filter(pk__in=ids)._amount_rows()
+            rows = super().update(**kwargs)
+            after = self.model.objects.filter(pk__in=ids)._amount_rows()
+            apply_totals_deltas(_accumulate(_accumulate(_new_deltas(), before, -1), after))
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            before = self._amount_rows()
+            result = super().delete()
+            apply_totals_deltas(_accumulate(_new_deltas(), before, -1))
+        return result
+
+    delete.alters_data = True
+
+# -------------------------------
+# Saldo inicial mensual por cliente (caché del estado de cuenta)
+# -------------------------------
+
+class SaldoMensual(models.Model):
+    customer = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='saldos_mensuales')
+    month = models.DateField()  # primer día del mes
+    opening_balance = models.DecimalField(max_digits=16, decimal_places=2)  # suma de facturas anteriores al mes
+
+    class Meta:
+        ordering = ['customer', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'month'], name='unique_saldo_mensual')
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} {self.month:%Y-%m}: {self.opening_balance}"
 
 # -------------------------------
 # Ítem de factura
@@ -158,6 +361,8 @@ class FacturaItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FacturaItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['id']
 
@@ -170,19 +375,119 @@ class FacturaItem(models.Model):
 
     @property
     def line_tax(self):
-        return (self.line_total_exclusive * (self.vat_percentage / Decimal('100.00')))
+        return line_amounts(self.unit_price, self.quantity, self.vat_percentage)[1]
 
     @property
     def line_total_inclusive(self):
         return self.line_total_exclusive + self.line_tax
 
-    def save(self, *args, **kwargs):
+    def amounts(self):
+        return (self.invoice_id, self.unit_price, self.quantity, self.vat_percentage)
+
+    def fill_defaults(self):
         if self.unit_price is None:
             self.unit_price = self.product.unit_price
         if self.vat_percentage is None:
             self.vat_percentage = self.product.vat_percentage or DEFAULT_VAT
-        super().save(*args, **kwargs)
-        try:
-            self.invoice.recalculate_totals()
-        except Exception:
-            pass
\ No newline at end of file
+
+    def save(self, *args, **kwargs):
+        self.fill_defaults()
+        with transaction.atomic(using=kwargs.get('using')):
+            deltas = _new_deltas()
+            if not self._state.adding:
+                # Valores actuales en BD (bloqueando la fila) para restar la línea anterior
+                previous = FacturaItem.objects.select_for_update().filter(pk=self.pk).values_list(*AMOUNT_FIELDS)
+                _accumulate(deltas, previous, -1)
+            super().save(*args, **kwargs)
+            _accumulate(deltas, [self.amounts()])
+            apply_totals_deltas(deltas)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = list(FacturaItem.objects.select_for_update().filter(pk=self.pk).values_list(*AMOUNT_FIELDS))
+            result = super().delete(*args, **kwargs)
+            apply_totals_deltas(_accumulate(_new_deltas(), previous, -1))
+        return result
+
+# -------------------------------
+# Trabajos en segundo plano (cola en BD)
+# -------------------------------
+
+class Trabajo(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En ejecución'),
+        (DONE, 'Terminado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    priority = models.IntegerField(default=0)  # mayor número = se ejecuta antes
+    dedup_key = models.CharField(max_length=255, blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(blank=True, null=True)  # visibility timeout
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='trabajo_status_run_at_idx'),
+        ]
+        constraints = [
+            # Solo puede haber un trabajo pendiente por clave de deduplicación
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_trabajo_dedup_key',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+# -------------------------------
+# Feed de cambios para sincronización
+# -------------------------------
+
+# Una fila por objeto sincronizable con la secuencia de su último cambio
+# (o su lápida si se borró), así el feed no crece con cada edición.
+class Cambio(models.Model):
+    CLIENTE = 'clientes'
+    PRODUCTO = 'productos'
+    FACTURA = 'facturas'
+    MODEL_CHOICES = [
+        (CLIENTE, 'Cliente'),
+        (PRODUCTO, 'Producto'),
+        (FACTURA, 'Factura'),
+    ]
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='cambios')
+    seq = models.BigIntegerField()
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['empresa', 'seq'], name='cambio_empresa_seq_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'model', 'object_id'], name='unique_cambio_por_objeto')
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} @{self.seq}"
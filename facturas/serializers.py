@@ -3,7 +3,10 @@ from .models import Usuario, Empresa, Cliente, Producto, Factura, FacturaItem
 from decimal import Decimal, InvalidOperation
 from django.utils import timezone
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
+from .autenticacion import login_fallido_reciente, registrar_login_fallido
 
 DEFAULT_VAT = Decimal('19.00')
 
@@ -14,7 +17,7 @@ DEFAULT_VAT = Decimal('19.00')
 class EmpresaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Empresa
-        exclude = ['user']
+        exclude = ['user', 'sync_seq', 'cache_version']
 
 # -------------------------------
 # Usuario con empresa
@@ -171,6 +174,7 @@ class FacturaSerializer(serializers.ModelSerializer):
 
         # ✅ Ya viene empresa desde la vista, no la pasamos de nuevo
         factura = Factura.objects.create(**validated_data)
+        items = []
 
         for idx, item_raw in enumerate(items_input):
             try:
@@ -186,18 +190,20 @@ class FacturaSerializer(serializers.ModelSerializer):
                 write_serializer.is_valid(raise_exception=True)
                 vi = write_serializer.validated_data
 
-                FacturaItem.objects.create(
+                items.append(FacturaItem(
                     invoice=factura,
                     product=vi['product'],
                     description=vi.get('description', ''),
                     unit_price=vi.get('unit_price', vi['product'].unit_price),
                     vat_percentage=vi.get('vat_percentage', vi['product'].vat_percentage or DEFAULT_VAT),
                     quantity=int(vi['quantity'])
-                )
+                ))
             except Exception as e:
                 raise serializers.ValidationError({f"item_{idx}": str(e)})
 
-        factura.recalculate_totals()
+        # Un solo INSERT para los ítems; los totales se suman por delta en la misma operación
+        FacturaItem.objects.bulk_create(items)
+        factura.refresh_from_db(fields=['subtotal', 'total_tax', 'total'])
         return factura
 
 # -------------------------------
@@ -205,15 +211,24 @@ class FacturaSerializer(serializers.ModelSerializer):
 # -------------------------------
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # Autentica una sola vez (antes se pagaba el hash de la contraseña dos veces)
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
 
-        user = authenticate(email=email, password=password)
-        if not user:
+        if login_fallido_reciente(email, password):
             raise serializers.ValidationError("Credenciales inválidas")
 
-        attrs["username"] = user.email
-        data = super().validate(attrs)
+        user = authenticate(request=self.context.get("request"), email=email, password=password)
+        if not user or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            registrar_login_fallido(email, password)
+            raise serializers.ValidationError("Credenciales inválidas")
+
+        self.user = user
+        refresh = self.get_token(user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+
         data["email"] = user.email
-        return data
\ No newline at end of file
+        return data
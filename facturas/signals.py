@@ -0,0 +1,132 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache_respuestas import invalidar_empresa
+from .dashboard import encolar_refresco
+from .estado_cuenta import invalidar_saldos
+from .models import (
+    Cambio, Cliente, Empresa, Factura, FacturaItem, LimiteEmpresa, Producto, Usuario, totales_actualizados,
+)
+from .sincronizacion import registrar_cambios
+from .throttling import invalidar_limites
+
+# -------------------------------
+# Feed de sincronización
+# -------------------------------
+
+SYNC_MODELS = {
+    Cliente: Cambio.CLIENTE,
+    Producto: Cambio.PRODUCTO,
+    Factura: Cambio.FACTURA,
+}
+
+
+def _sync_guardado(sender, instance, **kwargs):
+    registrar_cambios(instance.empresa_id, SYNC_MODELS[sender], [instance.pk])
+
+
+def _sync_eliminado(sender, instance, origin=None, **kwargs):
+    # Si se borra la empresa (o su usuario) el feed entero desaparece con ella
+    if isinstance(origin, (Empresa, Usuario)):
+        return
+    registrar_cambios(instance.empresa_id, SYNC_MODELS[sender], [instance.pk], deleted=True)
+
+
+for _model in SYNC_MODELS:
+    post_save.connect(_sync_guardado, sender=_model, dispatch_uid=f"sync_guardado_{_model.__name__}")
+    post_delete.connect(_sync_eliminado, sender=_model, dispatch_uid=f"sync_eliminado_{_model.__name__}")
+
+
+@receiver(totales_actualizados, sender=Factura)
+def _totales_actualizados(sender, factura_ids, **kwargs):
+    # Los deltas de totales se aplican con UPDATE y no pasan por post_save
+    por_empresa = {}
+    filas = Factura.objects.filter(pk__in=factura_ids).values_list('empresa_id', 'pk', 'customer_id', 'invoice_date')
+    for empresa_id, pk, customer_id, invoice_date in filas:
+        por_empresa.setdefault(empresa_id, []).append(pk)
+        invalidar_saldos(customer_id, invoice_date)
+    for empresa_id, pks in por_empresa.items():
+        registrar_cambios(empresa_id, Cambio.FACTURA, pks)
+        invalidar_empresa(empresa_id)
+        encolar_refresco(empresa_id)
+
+
+# -------------------------------
+# Caché de respuestas → nueva versión por empresa en cada escritura
+# -------------------------------
+
+def _invalidar_guardado(sender, instance, **kwargs):
+    invalidar_empresa(instance.empresa_id)
+
+
+def _invalidar_eliminado(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Empresa, Usuario)):
+        return
+    invalidar_empresa(instance.empresa_id)
+
+
+for _model in SYNC_MODELS:
+    post_save.connect(_invalidar_guardado, sender=_model, dispatch_uid=f"cache_guardado_{_model.__name__}")
+    post_delete.connect(_invalidar_eliminado, sender=_model, dispatch_uid=f"cache_eliminado_{_model.__name__}")
+
+
+@receiver(post_save, sender=FacturaItem)
+@receiver(post_delete, sender=FacturaItem)
+def _invalidar_item(sender, instance, origin=None, **kwargs):
+    # Al borrar una factura sus ítems caen en cascada; la factura ya invalida
+    if isinstance(origin, (Empresa, Usuario, Factura)):
+        return
+    empresa_id = Factura.objects.filter(pk=instance.invoice_id).values_list('empresa_id', flat=True).first()
+    if empresa_id is not None:
+        invalidar_empresa(empresa_id)
+
+
+# -------------------------------
+# Dashboard → recálculo en segundo plano cuando cambian las facturas
+# -------------------------------
+
+@receiver(post_save, sender=Factura)
+@receiver(post_delete, sender=Factura)
+def _refrescar_dashboard(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Empresa, Usuario)):
+        return
+    encolar_refresco(instance.empresa_id)
+
+
+# -------------------------------
+# Estado de cuenta → saldos mensuales afectados por la factura
+# -------------------------------
+
+@receiver(pre_save, sender=Factura)
+def _recordar_factura_anterior(sender, instance, update_fields=None, **kwargs):
+    # Si cambia la fecha o el cliente también hay que invalidar desde el valor anterior
+    instance._saldo_anterior = None
+    if instance.pk and (update_fields is None or {'invoice_date', 'customer'} & set(update_fields)):
+        instance._saldo_anterior = (
+            Factura.objects.filter(pk=instance.pk).values_list('customer_id', 'invoice_date').first()
+        )
+
+
+@receiver(post_save, sender=Factura)
+def _invalidar_saldos_guardado(sender, instance, **kwargs):
+    invalidar_saldos(instance.customer_id, instance.invoice_date)
+    anterior = getattr(instance, '_saldo_anterior', None)
+    if anterior and anterior != (instance.customer_id, instance.invoice_date):
+        invalidar_saldos(*anterior)
+
+
+@receiver(post_delete, sender=Factura)
+def _invalidar_saldos_eliminado(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Empresa, Usuario)):
+        return
+    invalidar_saldos(instance.customer_id, instance.invoice_date)
+
+
+# -------------------------------
+# Límites por empresa → invalidar la caché del throttle
+# -------------------------------
+
+@receiver(post_save, sender=LimiteEmpresa)
+@receiver(post_delete, sender=LimiteEmpresa)
+def _limite_cambiado(sender, instance, **kwargs):
+    invalidar_limites(instance.empresa_id)
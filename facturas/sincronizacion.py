@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Cambio, Cliente, Empresa, Factura, Producto
+from .serializers import ClienteSerializer, FacturaSerializer, ProductoSerializer
+
+# -------------------------------
+# Registro de cambios
+# -------------------------------
+
+MODELOS = {
+    Cambio.CLIENTE: (Cliente, ClienteSerializer),
+    Cambio.PRODUCTO: (Producto, ProductoSerializer),
+    Cambio.FACTURA: (Factura, FacturaSerializer),
+}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def registrar_cambios(empresa_id, model, object_ids, deleted=False):
+    """
+    Asigna a cada objeto una nueva secuencia de la empresa. El UPDATE sobre
+    la empresa bloquea su fila hasta el commit, así que las secuencias quedan
+    visibles en orden y ningún cliente se salta un cambio.
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    with transaction.atomic():
+        Empresa.objects.filter(pk=empresa_id).update(sync_seq=F('sync_seq') + len(object_ids))
+        last = Empresa.objects.filter(pk=empresa_id).values_list('sync_seq', flat=True).first()
+        if last is None:
+            return
+        first = last - len(object_ids) + 1
+        Cambio.objects.bulk_create(
+            [
+                Cambio(empresa_id=empresa_id, model=model, object_id=pk, seq=first + i, deleted=deleted)
+                for i, pk in enumerate(object_ids)
+            ],
+            update_conflicts=True,
+            unique_fields=['empresa', 'model', 'object_id'],
+            update_fields=['seq', 'deleted', 'changed_at'],
+        )
+
+
+# -------------------------------
+# Lectura del feed
+# -------------------------------
+
+def cambios_desde(empresa, since=0, limit=DEFAULT_LIMIT, context=None):
+    """
+    Devuelve los objetos cambiados y las lápidas con secuencia > `since`.
+    El costo depende del número de cambios, no del tamaño del catálogo.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    rows = list(
+        Cambio.objects.filter(empresa=empresa, seq__gt=since)
+        .order_by('seq')
+        .values_list('seq', 'model', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed = {name: [] for name in MODELOS}
+    deleted = {name: [] for name in MODELOS}
+    for _seq, model, object_id, is_deleted in rows:
+        (deleted if is_deleted else changed)[model].append(object_id)
+
+    data = {}
+    for name, (model, serializer_class) in MODELOS.items():
+        queryset = model.objects.filter(empresa=empresa, pk__in=changed[name])
+        if model is Factura:
+            queryset = queryset.select_related('customer')
+        data[name] = serializer_class(queryset, many=True, context=context or {}).data
+
+    return {
+        "cursor": rows[-1][0] if rows else since,
+        "has_more": has_more,
+        "changes": data,
+        "deleted": deleted,
+    }
@@ -1,3 +1,651 @@
-from django.test import TestCase
+import io
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import dashboard, trabajos
+from .cache_respuestas import LRUCache, local_cache
+from .estado_cuenta import estado_de_cuenta, parse_date_param
+from .importacion import importar_csv
+from .lectura import get_reader
+from .models import (
+    Cambio, Cliente, CuboTokens, Empresa, Factura, FacturaItem, LimiteEmpresa, Producto, SaldoMensual, Trabajo,
+    Usuario,
+)
+from .serializers import ClienteSerializer
+from .views import FacturaViewSet
+
+# -------------------------------
+# Cola de trabajos
+# -------------------------------
+
+llamadas = []
+
+
+@trabajos.tarea('tests.anotar')
+def anotar(valor):
+    llamadas.append(valor)
+
+
+@trabajos.tarea('tests.fallar')
+def fallar():
+    llamadas.append('fallo')
+    raise RuntimeError("boom")
+
+
+@trabajos.tarea('tests.dormir')
+def dormir(segundos):
+    time.sleep(segundos)
+    llamadas.append(Trabajo.objects.values_list('locked_until', flat=True).get(name='tests.dormir'))
+
+
+class TrabajosTests(TestCase):
+    def setUp(self):
+        llamadas.clear()
+
+    def test_encolar_deduplica_pendientes(self):
+        primero = trabajos.encolar('tests.anotar', {'valor': 1}, dedup_key='k')
+        segundo = trabajos.encolar('tests.anotar', {'valor': 2}, dedup_key='k', priority=5)
+        self.assertEqual(primero.pk, segundo.pk)
+        self.assertEqual(Trabajo.objects.get().priority, 5)
+
+    def test_encolar_tarea_desconocida(self):
+        with self.assertRaises(LookupError):
+            trabajos.encolar('tests.no_existe')
+
+    def test_reclamar_respeta_prioridad_y_run_at(self):
+        bajo = trabajos.encolar('tests.anotar', {'valor': 'bajo'})
+        alto = trabajos.encolar('tests.anotar', {'valor': 'alto'}, priority=10)
+        trabajos.encolar('tests.anotar', {'valor': 'futuro'}, delay=timedelta(hours=1))
+
+        reclamados = trabajos.reclamar(limit=10, worker_id='w1')
+        self.assertEqual([t.pk for t in reclamados], [alto.pk, bajo.pk])
+        self.assertTrue(all(t.status == Trabajo.RUNNING and t.locked_by == 'w1' for t in reclamados))
+        # Ya reclamados: otro worker no los ve
+        self.assertEqual(trabajos.reclamar(limit=10, worker_id='w2'), [])
+
+    def test_reclamar_recupera_bloqueos_vencidos(self):
+        trabajo = trabajos.encolar('tests.anotar', {'valor': 1})
+        trabajos.reclamar(worker_id='w1')
+        Trabajo.objects.filter(pk=trabajo.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        reclamado, = trabajos.reclamar(worker_id='w2')
+        self.assertEqual(reclamado.locked_by, 'w2')
+        self.assertEqual(reclamado.attempts, 2)
+
+    def test_reintento_con_backoff_y_fallo_final(self):
+        trabajo = trabajos.encolar('tests.fallar', max_attempts=2)
+
+        self.assertFalse(trabajos.ejecutar(trabajos.reclamar()[0]))
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.status, Trabajo.PENDING)
+        self.assertGreater(trabajo.run_at, timezone.now())
+        self.assertIn("boom", trabajo.last_error)
+
+        Trabajo.objects.filter(pk=trabajo.pk).update(run_at=timezone.now())
+        self.assertFalse(trabajos.ejecutar(trabajos.reclamar()[0]))
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.status, Trabajo.FAILED)
+        self.assertEqual(llamadas, ['fallo', 'fallo'])
+
+    def test_procesar_pendientes(self):
+        trabajos.encolar('tests.anotar', {'valor': 1})
+        trabajos.encolar('tests.anotar', {'valor': 2})
+        self.assertEqual(trabajos.procesar_pendientes(), 2)
+        self.assertEqual(sorted(llamadas), [1, 2])
+        self.assertEqual(Trabajo.objects.filter(status=Trabajo.DONE).count(), 2)
+
+    @override_settings(FACTURAS_TRABAJOS_EAGER=True)
+    def test_modo_eager(self):
+        trabajo = trabajos.encolar('tests.anotar', {'valor': 'ya'})
+        self.assertEqual(llamadas, ['ya'])
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.status, Trabajo.DONE)
+
+
+class LatidoTests(TransactionTestCase):
+    def setUp(self):
+        llamadas.clear()
+
+    @override_settings(FACTURAS_TRABAJOS_VISIBILITY_TIMEOUT=0.3)
+    def test_trabajo_largo_renueva_bloqueo(self):
+        trabajos.encolar('tests.dormir', {'segundos': 0.5})
+        trabajo, = trabajos.reclamar()
+
+        self.assertTrue(trabajos.ejecutar(trabajo))
+        # Pasado el visibility timeout original, el latido ya lo había extendido
+        self.assertGreater(llamadas[0], trabajo.locked_until)
+
+    @override_settings(FACTURAS_TRABAJOS_VISIBILITY_TIMEOUT=0.15)
+    def test_un_fallo_de_bd_no_detiene_el_latido(self):
+        trabajos.encolar('tests.anotar', {'valor': 1})
+        trabajo, = trabajos.reclamar()
+        filter_original = Trabajo.objects.filter
+        fallos = [OperationalError("database is locked")]
+
+        def filter_que_falla_una_vez(*args, **kwargs):
+            if fallos:
+                raise fallos.pop()
+            return filter_original(*args, **kwargs)
+
+        latido = trabajos._Latido(trabajo)
+        with mock.patch.object(Trabajo.objects, 'filter', side_effect=filter_que_falla_una_vez):
+            with self.assertLogs('facturas.trabajos', 'WARNING'):
+                latido.start()
+                time.sleep(0.3)
+                latido.stop()
+        renovado = Trabajo.objects.values_list('locked_until', flat=True).get(pk=trabajo.pk)
+        self.assertGreater(renovado, trabajo.locked_until)
+
+
+# -------------------------------
+# Importación CSV
+# -------------------------------
+
+class ImportacionCSVTests(TestCase):
+    def setUp(self):
+        self.user = Usuario.objects.create_user("csv@facturafast.local", "CSV", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=self.user, company_name="CSV")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def subir(self, contenido, **extra):
+        archivo = SimpleUploadedFile("clientes.csv", contenido, content_type="text/csv")
+        return self.client.post("/api/clientes/importar/", {"file": archivo, **extra}, format="multipart")
+
+    def test_cp1252_con_encoding(self):
+        contenido = "name,tax_identification_number\nJosé Peña,1\nMaría Ñáñez,2\n".encode("cp1252")
+        r = self.subir(contenido, encoding="cp1252")
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(r.json()["created"], 2)
+        self.assertTrue(Cliente.objects.filter(name="José Peña").exists())
+
+    def test_codificacion_equivocada_devuelve_400_con_la_fila(self):
+        contenido = "name,tax_identification_number\nAna,1\nJosé Peña,2\n".encode("cp1252")
+        r = self.subir(contenido)
+        self.assertEqual(r.status_code, 400, r.content)
+        self.assertEqual(r.json()["aborted"]["row"], 3)
+
+    def test_corte_conserva_lotes_anteriores(self):
+        filas = "".join(f"Cliente {i},{i}\n" for i in range(3)) + "José Peña,99\n"
+        contenido = io.BytesIO(("name,tax_identification_number\n" + filas).encode("cp1252"))
+        report = importar_csv(self.empresa, Cambio.CLIENTE, contenido, batch_size=2)
+        self.assertEqual(report["aborted"]["row"], 5)
+        # El primer lote (filas 2 y 3) ya quedó guardado; el lote en curso no
+        self.assertEqual(report["aborted"]["committed_through_row"], 3)
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(Cliente.objects.filter(empresa=self.empresa).count(), 2)
+
+    def test_celdas_vacias_usan_los_valores_por_defecto(self):
+        contenido = io.BytesIO(b"name,unit_price,vat_percentage,description\nX,1.00,,\n")
+        report = importar_csv(self.empresa, Cambio.PRODUCTO, contenido)
+        self.assertEqual(report["error_count"], 0, report["errors"])
+        producto = Producto.objects.get(empresa=self.empresa, name="X")
+        self.assertEqual(producto.vat_percentage, Decimal("19.00"))
+        self.assertEqual(producto.description, "")
+
+    def test_encoding_desconocido(self):
+        r = self.subir(b"name\nA\n", encoding="no-existe")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("encoding", r.json())
+
+
+# -------------------------------
+# Totales por deltas
+# -------------------------------
+
+class TotalesTests(TestCase):
+    def setUp(self):
+        user = Usuario.objects.create_user("totales@facturafast.local", "Totales", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=user, company_name="Totales")
+        cliente = Cliente.objects.create(empresa=self.empresa, name="Cliente")
+        # 11.50 al 25 % deja un IVA de 2.875 por línea: el redondeo importa
+        self.producto = Producto.objects.create(
+            empresa=self.empresa, name="Producto", unit_price=Decimal("11.50"), vat_percentage=Decimal("25.00")
+        )
+        self.factura = Factura.objects.create(empresa=self.empresa, customer=cliente)
+
+    def item(self, **kwargs):
+        return FacturaItem(invoice=self.factura, product=self.producto, **kwargs)
+
+    def assertTotales(self, subtotal, total_tax):
+        self.factura.refresh_from_db()
+        stored = (self.factura.subtotal, self.factura.total_tax, self.factura.total)
+        self.assertEqual(stored, (Decimal(subtotal), Decimal(total_tax), Decimal(subtotal) + Decimal(total_tax)))
+        # Siempre igual a un recálculo completo
+        self.factura.recalculate_totals()
+        self.factura.refresh_from_db()
+        self.assertEqual((self.factura.subtotal, self.factura.total_tax, self.factura.total), stored)
+
+    def test_iva_se_redondea_sobre_la_suma(self):
+        self.item().save()
+        self.item().save()
+        # 2.875 + 2.875 = 5.75 (redondear por línea daría 5.76)
+        self.assertTotales("23.00", "5.75")
+
+    def test_save_actualiza_y_resta_la_linea_anterior(self):
+        item = self.item()
+        item.save()
+        item.quantity = 3
+        item.save()
+        self.assertTotales("34.50", "8.63")
+
+    def test_delete(self):
+        item = self.item()
+        item.save()
+        self.item().save()
+        item.delete()
+        self.assertTotales("11.50", "2.88")
+
+    def test_queryset_update_y_bulk_update(self):
+        items = FacturaItem.objects.bulk_create([self.item(), self.item()])
+        self.assertTotales("23.00", "5.75")
+
+        FacturaItem.objects.filter(pk=items[0].pk).update(quantity=2)
+        self.assertTotales("34.50", "8.63")
+
+        items = list(FacturaItem.objects.all())
+        for item in items:
+            item.unit_price = Decimal("10.00")
+        FacturaItem.objects.bulk_update(items, ["unit_price"])
+        self.assertTotales("30.00", "7.50")
+
+    def test_queryset_delete(self):
+        FacturaItem.objects.bulk_create([self.item(), self.item(), self.item()])
+        FacturaItem.objects.filter(pk__in=FacturaItem.objects.values("pk")[:2]).delete()
+        self.assertTotales("11.50", "2.88")
+
+    def test_bulk_create_con_update_conflicts_resta_la_fila_existente(self):
+        item = self.item()
+        item.save()
+        cambiado = self.item(pk=item.pk, quantity=4)
+        nuevo = self.item()
+        FacturaItem.objects.bulk_create(
+            [cambiado, nuevo],
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["quantity"],
+        )
+        self.assertEqual(FacturaItem.objects.count(), 2)
+        self.assertTotales("57.50", "14.38")
+
+    def test_bulk_create_con_ignore_conflicts_no_suma_la_fila_ignorada(self):
+        item = self.item()
+        item.save()
+        FacturaItem.objects.bulk_create([self.item(pk=item.pk, quantity=9)], ignore_conflicts=True)
+        self.assertTotales("11.50", "2.88")
+
+    def test_verificar_totales_no_marca_facturas_cuadradas(self):
+        self.item().save()
+        self.item().save()
+        out = io.StringIO()
+        call_command("verificar_totales", stdout=out)
+        self.assertIn("0 con descuadre", out.getvalue())
+
+        Factura.objects.filter(pk=self.factura.pk).update(total=Decimal("1.00"))
+        call_command("verificar_totales", "--fix", stdout=io.StringIO())
+        self.assertTotales("23.00", "5.75")
+
+
+# -------------------------------
+# Throttle por empresa
+# -------------------------------
+
+@override_settings(FACTURAS_THROTTLE_CACHE='default')
+class ThrottleTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        user = Usuario.objects.create_user("throttle@facturafast.local", "Throttle", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=user, company_name="Throttle")
+        LimiteEmpresa.objects.create(empresa=self.empresa, read_per_minute=3, write_per_minute=2)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_cubo_de_lectura(self):
+        codes = [self.client.get("/api/productos/").status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+        self.assertIn("Retry-After", self.client.get("/api/productos/").headers)
+
+    def test_lectura_y_escritura_tienen_cubos_separados(self):
+        for _ in range(3):
+            self.client.get("/api/productos/")
+        r = self.client.post("/api/productos/", {"name": "P", "unit_price": "1.00"})
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(CuboTokens.objects.get(empresa=self.empresa, scope="write").tokens, 1)
+
+    def test_recarga_con_el_tiempo(self):
+        for _ in range(3):
+            self.client.get("/api/productos/")
+        # Un minuto después el cubo vuelve a estar lleno
+        CuboTokens.objects.filter(empresa=self.empresa).update(refilled_at=F('refilled_at') - 60)
+        self.assertEqual(self.client.get("/api/productos/").status_code, 200)
+
+
+# -------------------------------
+# Admin
+# -------------------------------
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser("admin@facturafast.local", "Admin", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=self.admin, company_name="Admin")
+        self.cliente = Cliente.objects.create(empresa=self.empresa, name="Cliente")
+        self.client.force_login(self.admin)
+
+    def factura_con_items(self, n):
+        factura = Factura.objects.create(empresa=self.empresa, customer=self.cliente)
+        productos = Producto.objects.bulk_create(
+            Producto(empresa=self.empresa, name=f"Producto {i}", unit_price=Decimal("1.00")) for i in range(n)
+        )
+        FacturaItem.objects.bulk_create(FacturaItem(invoice=factura, product=p) for p in productos)
+        return factura
+
+    def contar(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_listado_de_items_no_depende_de_las_filas(self):
+        self.factura_con_items(2)
+        pocos = self.contar("/admin/facturas/facturaitem/")
+        self.factura_con_items(20)
+        self.assertEqual(self.contar("/admin/facturas/facturaitem/"), pocos)
+
+    def test_inline_de_items_una_consulta_por_fila_como_maximo(self):
+        una = self.contar(f"/admin/facturas/factura/{self.factura_con_items(1).pk}/change/")
+        veintiuna = self.contar(f"/admin/facturas/factura/{self.factura_con_items(21).pk}/change/")
+        self.assertLessEqual(veintiuna - una, 20)
+
+
+# -------------------------------
+# Lectura rápida
+# -------------------------------
+
+class LecturaTests(TestCase):
+    def setUp(self):
+        user = Usuario.objects.create_user("lectura@facturafast.local", "Lectura", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=user, company_name="Lectura")
+        Cliente.objects.create(empresa=self.empresa, name="Cliente")
+
+    def test_lector_compilado_una_vez(self):
+        self.assertIs(get_reader(ClienteSerializer), get_reader(ClienteSerializer))
+
+    def test_zona_horaria_se_resuelve_al_renderizar(self):
+        queryset = Cliente.objects.filter(empresa=self.empresa)
+        reader = get_reader(ClienteSerializer)
+        for tz in ("America/Bogota", "Europe/Madrid"):
+            with timezone.override(tz):
+                self.assertEqual(reader.serialize(queryset), ClienteSerializer(queryset, many=True).data)
+
+    @override_settings(FACTURAS_THROTTLE_CACHE='default', FACTURAS_RESPONSE_CACHE='default')
+    def test_listado_en_stream_igual_al_normal(self):
+        caches['default'].clear()
+        cliente = Cliente.objects.first()
+        producto = Producto.objects.create(empresa=self.empresa, name="P", unit_price=Decimal("3.33"))
+        for i in range(5):
+            factura = Factura.objects.create(empresa=self.empresa, customer=cliente)
+            FacturaItem.objects.create(invoice=factura, product=producto, quantity=i + 1)
+
+        client = APIClient()
+        client.force_authenticate(self.empresa.user)
+        normal = client.get("/api/facturas/")
+        with mock.patch.object(FacturaViewSet, 'stream_chunk_size', 2):
+            stream = client.get("/api/facturas/", {"stream": "1"})
+        self.assertEqual(stream.status_code, 200)
+        self.assertEqual(b"".join(stream.streaming_content), normal.content)
+
+
+# -------------------------------
+# Caché de respuestas
+# -------------------------------
+
+@override_settings(FACTURAS_RESPONSE_CACHE='default')
+class CacheRespuestasTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        local_cache.clear()
+        self.user = Usuario.objects.create_user("cache@facturafast.local", "Cache", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=self.user, company_name="Cache")
+        self.client = APIClient()
+
+    def get(self, url):
+        # Un usuario recién cargado, como en cada request real
+        self.client.force_authenticate(Usuario.objects.get(pk=self.user.pk))
+        return self.client.get(url)
+
+    def test_escritura_invalida_al_confirmar(self):
+        self.assertEqual(self.get("/api/clientes/")["X-Cache"], "MISS")
+        self.assertEqual(self.get("/api/clientes/")["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(empresa=self.empresa, name="Nuevo")
+        r = self.get("/api/clientes/")
+        self.assertEqual(r["X-Cache"], "MISS")
+        self.assertEqual(len(r.json()), 1)
+
+    def test_guardar_una_empresa_vieja_no_retrocede_los_contadores(self):
+        vieja = Empresa.objects.get(pk=self.empresa.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(empresa=self.empresa, name="Nuevo")
+        actual = Empresa.objects.values_list('cache_version', 'sync_seq').get(pk=self.empresa.pk)
+        vieja.company_name = "Renombrada"
+        vieja.save()
+        self.assertEqual(Empresa.objects.values_list('cache_version', 'sync_seq').get(pk=self.empresa.pk), actual)
+        self.assertEqual(Empresa.objects.get(pk=self.empresa.pk).company_name, "Renombrada")
+
+    def test_el_registro_no_expone_los_contadores(self):
+        r = APIClient().post("/api/registro/", {
+            "email": "nueva@facturafast.local", "full_name": "Nueva", "password": "clave-segura-1",
+            "empresa": {"company_name": "Nueva"},
+        }, format="json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertNotIn("cache_version", r.json()["empresa"])
+        self.assertNotIn("sync_seq", r.json()["empresa"])
+
+    def test_lru_caduca(self):
+        lru = LRUCache(maxsize=2, ttl=0.05)
+        lru.set("a", 1)
+        self.assertEqual(lru.get("a"), 1)
+        time.sleep(0.06)
+        self.assertIsNone(lru.get("a"))
+
+
+# -------------------------------
+# Estado de cuenta
+# -------------------------------
+
+class EstadoCuentaTests(TestCase):
+    def setUp(self):
+        user = Usuario.objects.create_user("saldo@facturafast.local", "Saldo", "clave-segura-1")
+        empresa = Empresa.objects.create(user=user, company_name="Saldo")
+        self.cliente = Cliente.objects.create(empresa=empresa, name="Cliente")
+        Factura.objects.create(empresa=empresa, customer=self.cliente, total=Decimal("10.00"))
+
+    def test_meses_pasados_se_guardan(self):
+        self.assertEqual(estado_de_cuenta(self.cliente, desde=parse_date_param("2020-01-01"))["opening_balance"], "0.00")
+        self.assertTrue(SaldoMensual.objects.filter(customer=self.cliente).exists())
+
+    def test_meses_futuros_no_se_guardan(self):
+        data = estado_de_cuenta(self.cliente, desde=parse_date_param("2099-01-01"))
+        self.assertEqual(data["opening_balance"], "10.00")
+        self.assertFalse(SaldoMensual.objects.filter(customer=self.cliente).exists())
+
+
+# -------------------------------
+# Dashboard
+# -------------------------------
+
+@override_settings(
+    FACTURAS_DASHBOARD_CACHE='default', FACTURAS_THROTTLE_CACHE='default', FACTURAS_TRABAJOS_EAGER=False,
+)
+class DashboardTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        user = Usuario.objects.create_user("dash@facturafast.local", "Dash", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=user, company_name="Dash")
+        cliente = Cliente.objects.create(empresa=self.empresa, name="Cliente")
+        producto = Producto.objects.create(empresa=self.empresa, name="P", unit_price=Decimal("10.00"))
+        factura = Factura.objects.create(empresa=self.empresa, customer=cliente)
+        FacturaItem.objects.create(invoice=factura, product=producto, quantity=2)
+        # Los refrescos que encolaron las señales no interesan aquí
+        Trabajo.objects.all().delete()
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_cache_fria_calcula_una_sola_vez(self):
+        with mock.patch.object(dashboard, 'calcular_kpis', wraps=dashboard.calcular_kpis) as calcular:
+            primera = self.client.get("/api/dashboard/").json()
+            segunda = self.client.get("/api/dashboard/").json()
+        self.assertEqual(calcular.call_count, 1)
+        self.assertFalse(primera["stale"])
+        self.assertFalse(segunda["stale"])
+        self.assertEqual(primera["top_customers"][0]["revenue"], "23.80")
+        self.assertFalse(Trabajo.objects.exists())
+
+    def test_entrada_vencida_se_sirve_y_encola_un_refresco(self):
+        entry = dashboard.refrescar(self.empresa.pk)
+        entry["computed_at"] -= dashboard._fresh_for() + 1
+        caches['default'].set(dashboard._cache_key(self.empresa.pk), entry, timeout=None)
+
+        with mock.patch.object(dashboard, 'calcular_kpis', wraps=dashboard.calcular_kpis) as calcular:
+            for _ in range(2):
+                data = self.client.get("/api/dashboard/").json()
+                self.assertTrue(data["stale"])
+                self.assertEqual(data["top_customers"], entry["data"]["top_customers"])
+        calcular.assert_not_called()
+
+        trabajo = Trabajo.objects.get()
+        self.assertEqual(trabajo.name, 'facturas.refrescar_dashboard')
+        self.assertEqual(trabajo.payload, {'empresa_id': self.empresa.pk})
+        self.assertEqual(trabajo.status, Trabajo.PENDING)
+
+
+# -------------------------------
+# Feed de sincronización
+# -------------------------------
+
+@override_settings(FACTURAS_THROTTLE_CACHE='default', FACTURAS_RESPONSE_CACHE='default')
+class SincronizacionTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = Usuario.objects.create_user("sync@facturafast.local", "Sync", "clave-segura-1")
+        self.empresa = Empresa.objects.create(user=self.user, company_name="Sync")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=0, **params):
+        r = self.client.get("/api/sync/", {"since": since, **params})
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def test_cursor_avanza(self):
+        Cliente.objects.create(empresa=self.empresa, name="A")
+        primera = self.sync()
+        self.assertEqual([c["name"] for c in primera["changes"]["clientes"]], ["A"])
+
+        Cliente.objects.create(empresa=self.empresa, name="B")
+        segunda = self.sync(primera["cursor"])
+        self.assertGreater(segunda["cursor"], primera["cursor"])
+        self.assertEqual([c["name"] for c in segunda["changes"]["clientes"]], ["B"])
+        self.assertEqual(self.sync(segunda["cursor"])["changes"]["clientes"], [])
+
+    def test_has_more_y_limit(self):
+        for i in range(3):
+            Cliente.objects.create(empresa=self.empresa, name=f"C{i}")
+        pagina = self.sync(limit=2)
+        self.assertTrue(pagina["has_more"])
+        self.assertEqual(len(pagina["changes"]["clientes"]), 2)
+        resto = self.sync(pagina["cursor"], limit=2)
+        self.assertFalse(resto["has_more"])
+        self.assertEqual(len(resto["changes"]["clientes"]), 1)
+
+    def test_lapida_al_borrar(self):
+        cliente = Cliente.objects.create(empresa=self.empresa, name="A")
+        cursor = self.sync()["cursor"]
+        pk = cliente.pk
+        cliente.delete()
+        data = self.sync(cursor)
+        self.assertEqual(data["deleted"]["clientes"], [pk])
+        self.assertEqual(data["changes"]["clientes"], [])
+
+    def test_reeditar_mueve_la_misma_fila(self):
+        cliente = Cliente.objects.create(empresa=self.empresa, name="A")
+        antes = Cambio.objects.get(model=Cambio.CLIENTE, object_id=cliente.pk).seq
+        cliente.name = "A2"
+        cliente.save()
+        cambios = Cambio.objects.filter(model=Cambio.CLIENTE, object_id=cliente.pk)
+        self.assertEqual(cambios.count(), 1)
+        self.assertGreater(cambios.get().seq, antes)
+
+    def test_deltas_de_totales_aparecen_en_el_feed(self):
+        cliente = Cliente.objects.create(empresa=self.empresa, name="A")
+        producto = Producto.objects.create(empresa=self.empresa, name="P", unit_price=Decimal("10.00"))
+        factura = Factura.objects.create(empresa=self.empresa, customer=cliente)
+        cursor = self.sync()["cursor"]
+
+        # bulk_create no dispara post_save: la factura entra al feed por totales_actualizados
+        FacturaItem.objects.bulk_create([FacturaItem(invoice=factura, product=producto, quantity=2)])
+        data = self.sync(cursor)
+        self.assertEqual([f["id"] for f in data["changes"]["facturas"]], [factura.pk])
+        self.assertEqual(data["changes"]["facturas"][0]["subtotal"], "20.00")
+
+
+# -------------------------------
+# Login
+# -------------------------------
+
+@override_settings(
+    FACTURAS_LOGIN_CACHE='default', FACTURAS_THROTTLE_CACHE='default',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LoginTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = Usuario.objects.create_user("login@facturafast.local", "Login", "clave-segura-1")
+        Empresa.objects.create(user=self.user, company_name="Login")
+        self.client = APIClient()
+
+    def login(self, email, password):
+        return self.client.post("/api/login/", {"email": email, "password": password}, format="json")
+
+    def patch_check_password(self):
+        return mock.patch.object(
+            Usuario, 'check_password', autospec=True, side_effect=Usuario.check_password,
+        )
+
+    def test_login_valido_verifica_la_contrasena_una_vez(self):
+        with self.patch_check_password() as check_password:
+            r = self.login("login@facturafast.local", "clave-segura-1")
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(set(r.json()), {"refresh", "access", "email"})
+        self.assertEqual(r.json()["email"], "login@facturafast.local")
+        self.assertEqual(check_password.call_count, 1)
+
+    def test_par_fallido_repetido_no_vuelve_a_calcular_el_hash(self):
+        with self.patch_check_password() as check_password:
+            for _ in range(2):
+                r = self.login("login@facturafast.local", "incorrecta")
+                self.assertEqual(r.status_code, 400)
+        self.assertEqual(check_password.call_count, 1)
+
+        # Otra contraseña para el mismo email sí se verifica
+        with self.patch_check_password() as check_password:
+            self.assertEqual(self.login("login@facturafast.local", "clave-segura-1").status_code, 200)
+        self.assertEqual(check_password.call_count, 1)
+
+    def test_usuario_inactivo_rechazado(self):
+        self.user.is_active = False
+        self.user.save()
+        r = self.login("login@facturafast.local", "clave-segura-1")
+        self.assertEqual(r.status_code, 400)
+        self.assertNotIn("access", r.json())
@@ -0,0 +1,105 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .models import CuboTokens, LimiteEmpresa
+
+# -------------------------------
+# Throttle por empresa (token bucket en BD)
+# -------------------------------
+
+OVERRIDE_TTL = 60  # segundos que se cachean los límites personalizados de una empresa
+
+
+def _cache():
+    return caches[getattr(settings, 'FACTURAS_THROTTLE_CACHE', 'default')]
+
+
+def _parse_rate(rate):
+    """'600/min' → (capacidad, tokens por segundo)."""
+    num, period = rate.split('/')
+    seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return int(num), int(num) / seconds
+
+
+def override_cache_key(empresa_id):
+    return f"throttle:limite:{empresa_id}"
+
+
+def invalidar_limites(empresa_id):
+    _cache().delete(override_cache_key(empresa_id))
+
+
+class EmpresaRateThrottle(BaseThrottle):
+    """
+    Un cubo de tokens por empresa y tipo de operación (lectura/escritura).
+    El cubo es una fila de CuboTokens que se recarga y consume en un único
+    UPDATE condicional, así que es atómico entre workers: una empresa no
+    puede acaparar los workers del resto.
+    """
+
+    def allow_request(self, request, view):
+        empresa = getattr(request.user, 'empresa', None) if request.user.is_authenticated else None
+        if empresa is None:
+            return True
+
+        scope = 'read' if request.method in SAFE_METHODS else 'write'
+        capacity, refill = self.get_rate(empresa.pk, scope)
+        now = time.time()
+
+        if self._consume(empresa.pk, scope, capacity, refill, now):
+            return True
+        try:
+            # Primer request de la empresa en este scope
+            with transaction.atomic():
+                CuboTokens.objects.create(empresa_id=empresa.pk, scope=scope, tokens=capacity - 1, refilled_at=now)
+            return True
+        except IntegrityError:
+            pass
+        # La fila ya existía (otro worker la creó entre medias): se reintenta una vez
+        if self._consume(empresa.pk, scope, capacity, refill, now):
+            return True
+
+        row = CuboTokens.objects.filter(empresa_id=empresa.pk, scope=scope).values_list(
+            'tokens', 'refilled_at'
+        ).first()
+        tokens = min(capacity, row[0] + (now - row[1]) * refill) if row else 0
+        self._wait = max(0, (1 - tokens) / refill)
+        return False
+
+    @staticmethod
+    def _consume(empresa_id, scope, capacity, refill, now):
+        refilled = Least(
+            Value(float(capacity)),
+            F('tokens') + (Value(now) - F('refilled_at')) * Value(refill),
+            output_field=FloatField(),
+        )
+        return CuboTokens.objects.filter(empresa_id=empresa_id, scope=scope).filter(
+            GreaterThanOrEqual(refilled, 1)
+        ).update(tokens=refilled - 1, refilled_at=now)
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+    def get_rate(self, empresa_id, scope):
+        cache = _cache()
+        key = override_cache_key(empresa_id)
+        limits = cache.get(key)
+        if limits is None:
+            row = LimiteEmpresa.objects.filter(empresa_id=empresa_id).values_list(
+                'read_per_minute', 'write_per_minute'
+            ).first()
+            limits = row or (None, None)
+            cache.set(key, limits, timeout=OVERRIDE_TTL)
+
+        per_minute = limits[0] if scope == 'read' else limits[1]
+        if per_minute:
+            return _parse_rate(f"{per_minute}/min")
+        return _parse_rate(settings.FACTURAS_THROTTLE_RATES[scope])
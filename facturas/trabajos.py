@@ -0,0 +1,236 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Factura, Trabajo
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Registro de tareas
+# -------------------------------
+
+_registry = {}
+
+
+def tarea(name):
+    """Registra una función como tarea encolable bajo `name`."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_tarea(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Tarea no registrada: {name}")
+
+
+def _visibility_timeout():
+    return getattr(settings, 'FACTURAS_TRABAJOS_VISIBILITY_TIMEOUT', 300)
+
+
+def _is_eager():
+    return getattr(settings, 'FACTURAS_TRABAJOS_EAGER', False)
+
+
+# -------------------------------
+# Encolar
+# -------------------------------
+
+def encolar(name, payload=None, *, priority=0, dedup_key=None, delay=None, max_attempts=3):
+    """
+    Crea un trabajo pendiente. Si ya existe uno pendiente con la misma
+    `dedup_key` se reutiliza (subiendo su prioridad si hace falta).
+    En modo eager (FACTURAS_TRABAJOS_EAGER) se ejecuta en el acto.
+    """
+    get_tarea(name)  # falla pronto si el nombre no existe
+    run_at = timezone.now() + (delay or timedelta(0))
+
+    if dedup_key:
+        existing = Trabajo.objects.filter(dedup_key=dedup_key, status=Trabajo.PENDING).first()
+        if existing:
+            if priority > existing.priority:
+                Trabajo.objects.filter(pk=existing.pk).update(priority=priority)
+                existing.priority = priority
+            return existing
+
+    try:
+        with transaction.atomic():
+            trabajo = Trabajo.objects.create(
+                name=name,
+                payload=payload or {},
+                priority=priority,
+                dedup_key=dedup_key,
+                run_at=run_at,
+                max_attempts=max_attempts,
+            )
+    except IntegrityError:
+        # Otro proceso encoló el mismo trabajo entre el filtro y el insert
+        return Trabajo.objects.get(dedup_key=dedup_key, status=Trabajo.PENDING)
+
+    if _is_eager():
+        ejecutar(trabajo)
+    return trabajo
+
+
+# -------------------------------
+# Reclamar y ejecutar
+# -------------------------------
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable(now):
+    return Trabajo.objects.filter(
+        Q(status=Trabajo.PENDING, run_at__lte=now)
+        | Q(status=Trabajo.RUNNING, locked_until__lt=now)
+    )
+
+
+def reclamar(limit=10, worker_id=None):
+    """
+    Reclama hasta `limit` trabajos listos. El UPDATE condicional garantiza
+    que cada trabajo lo toma un solo worker, también en SQLite.
+    """
+    now = timezone.now()
+    worker_id = worker_id or _worker_id()
+    locked_until = now + timedelta(seconds=_visibility_timeout())
+    candidates = list(
+        _claimable(now).order_by('-priority', 'run_at', 'id').values_list('id', flat=True)[:limit]
+    )
+
+    claimed = []
+    for pk in candidates:
+        updated = _claimable(now).filter(pk=pk).update(
+            status=Trabajo.RUNNING,
+            locked_until=locked_until,
+            locked_by=worker_id,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Trabajo.objects.filter(pk__in=claimed).order_by('-priority', 'run_at', 'id'))
+
+
+class _Latido(threading.Thread):
+    """
+    Mientras el trabajo corre, renueva su `locked_until` cada tercio del
+    visibility timeout. Así un trabajo largo no se vuelve reclamable y no lo
+    ejecuta otro worker a la vez. Si el bloqueo ya pasó a otro worker, no lo toca.
+    """
+
+    def __init__(self, trabajo):
+        super().__init__(name=f"latido-trabajo-{trabajo.pk}", daemon=True)
+        self.trabajo_id = trabajo.pk
+        self.locked_by = trabajo.locked_by
+        self.timeout = _visibility_timeout()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.timeout / 3):
+            try:
+                Trabajo.objects.filter(
+                    pk=self.trabajo_id, status=Trabajo.RUNNING, locked_by=self.locked_by
+                ).update(locked_until=timezone.now() + timedelta(seconds=self.timeout))
+            except DatabaseError:
+                # Un fallo puntual (pool agotado, BD bloqueada) no debe parar las renovaciones siguientes
+                logger.warning("No se pudo renovar el bloqueo del trabajo %s", self.trabajo_id, exc_info=True)
+            finally:
+                # Conexión propia del hilo: se devuelve enseguida (con pool, al pool)
+                connection.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(2 ** attempts * 5, 3600))
+
+
+def ejecutar(trabajo):
+    """Ejecuta un trabajo ya reclamado y registra el resultado o el reintento."""
+    if trabajo.status != Trabajo.RUNNING:
+        Trabajo.objects.filter(pk=trabajo.pk).update(status=Trabajo.RUNNING, attempts=F('attempts') + 1)
+        trabajo.refresh_from_db()
+
+    # Solo los trabajos reclamados tienen visibility timeout que renovar
+    latido = _Latido(trabajo) if trabajo.locked_until is not None else None
+    if latido:
+        latido.start()
+    error = None
+    try:
+        get_tarea(trabajo.name)(**trabajo.payload)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        if latido:
+            latido.stop()
+
+    if error is not None:
+        logger.warning("Trabajo %s falló (intento %s): %s", trabajo.pk, trabajo.attempts, error)
+        if trabajo.attempts >= trabajo.max_attempts:
+            fields = {'status': Trabajo.FAILED}
+        else:
+            fields = {'status': Trabajo.PENDING, 'run_at': timezone.now() + _backoff(trabajo.attempts)}
+        try:
+            with transaction.atomic():
+                Trabajo.objects.filter(pk=trabajo.pk).update(
+                    locked_until=None, last_error=error, updated_at=timezone.now(), **fields
+                )
+        except IntegrityError:
+            # Ya hay otro pendiente con la misma dedup_key; ese hará el trabajo
+            Trabajo.objects.filter(pk=trabajo.pk).update(
+                status=Trabajo.FAILED, locked_until=None, last_error=error, updated_at=timezone.now()
+            )
+        return False
+
+    Trabajo.objects.filter(pk=trabajo.pk).update(
+        status=Trabajo.DONE, locked_until=None, last_error='', updated_at=timezone.now()
+    )
+    return True
+
+
+def procesar_pendientes(limit=None):
+    """Ejecuta en el hilo actual todos los trabajos listos. Útil en tests y scripts."""
+    processed = 0
+    while limit is None or processed < limit:
+        batch = reclamar(limit=1)
+        if not batch:
+            break
+        ejecutar(batch[0])
+        processed += 1
+    return processed
+
+
+# -------------------------------
+# Tareas de facturación
+# -------------------------------
+
+@tarea('facturas.recalcular_totales')
+def recalcular_totales_factura(factura_id):
+    factura = Factura.objects.filter(pk=factura_id).first()
+    if factura is not None:
+        factura.recalculate_totals()
+
+
+def encolar_recalculo_totales(factura_id, priority=0):
+    return encolar(
+        'facturas.recalcular_totales',
+        {'factura_id': factura_id},
+        priority=priority,
+        dedup_key=f"factura:{factura_id}:totales",
+    )
@@ -6,6 +6,9 @@ from .views import (
     ClienteViewSet,
     ProductoViewSet,
     FacturaViewSet,
+    SyncView,
+    DashboardView,
+    DiagnosticoView,
     CustomTokenObtainPairView,  # 👈 añadimos nuestra vista personalizada
 )
 from rest_framework_simplejwt.views import TokenRefreshView
@@ -21,6 +24,15 @@ urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),  # 👈 ahora usa el serializer con email
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
+    # Sincronización incremental (clientes, productos y facturas)
+    path('sync/', SyncView.as_view(), name='sync'),
+
+    # Dashboard de KPIs (cacheado)
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+
+    # Diagnóstico (caché, etc.)
+    path('diagnostico/', DiagnosticoView.as_view(), name='diagnostico'),
+
     # API recursos (GET/POST/PUT/DELETE para clientes, productos y facturas)
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,6 +1,11 @@
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import generics, viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.core import signing
+import codecs
 import traceback
 
 from .serializers import (
@@ -12,6 +17,14 @@ from .serializers import (
 )
 
 from .models import Usuario, Cliente, Producto, Factura
+from .cache_respuestas import CachedReadMixin, get_stats
+from .dashboard import obtener_dashboard
+from .diagnostico import estadisticas_bd
+from .estado_cuenta import DEFAULT_LIMIT as STATEMENT_LIMIT, estado_de_cuenta, parse_date_param
+from .importacion import DEFAULT_ENCODING, importar_csv
+from .lectura import FastReadMixin, StreamingListMixin
+from .sincronizacion import DEFAULT_LIMIT, cambios_desde
+from .trabajos import encolar_recalculo_totales
 
 # 🔐 Login personalizado con email
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -23,8 +36,30 @@ class RegistroUsuarioView(generics.CreateAPIView):
     serializer_class = UsuarioRegistroSerializer
     permission_classes = [permissions.AllowAny]
 
+# 📥 Importación masiva por CSV (POST multipart con el campo "file" y opcionalmente "encoding", p. ej. cp1252)
+class ImportarCSVMixin:
+    import_model = None
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": "Debes adjuntar un archivo CSV"}, status=status.HTTP_400_BAD_REQUEST)
+        encoding = request.data.get('encoding') or DEFAULT_ENCODING
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            return Response({"encoding": f"Codificación desconocida: {encoding}"}, status=status.HTTP_400_BAD_REQUEST)
+        report = importar_csv(request.user.empresa, self.import_model, upload.file, encoding=encoding)
+        if "aborted" in report:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
 # 👥 CRUD de clientes
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(CachedReadMixin, FastReadMixin, ImportarCSVMixin, viewsets.ModelViewSet):
+    import_model = 'clientes'
+    fast_read = True
+    cached_actions = ('list', 'retrieve')
     serializer_class = ClienteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -34,8 +69,25 @@ class ClienteViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(empresa=self.request.user.empresa)
 
+    # 📒 Estado de cuenta: ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD&cursor=...&limit=N
+    @action(detail=True, methods=['get'], url_path='estado-cuenta')
+    def estado_cuenta(self, request, pk=None):
+        cliente = self.get_object()
+        params = request.query_params
+        try:
+            desde = parse_date_param(params['desde']) if params.get('desde') else None
+            hasta = parse_date_param(params['hasta'], end=True) if params.get('hasta') else None
+            limit = int(params.get('limit', STATEMENT_LIMIT))
+            data = estado_de_cuenta(cliente, desde=desde, hasta=hasta, cursor=params.get('cursor'), limit=limit)
+        except (ValueError, signing.BadSignature):
+            return Response({"detail": "Parámetros inválidos"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
 # 📦 CRUD de productos
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(CachedReadMixin, FastReadMixin, ImportarCSVMixin, viewsets.ModelViewSet):
+    import_model = 'productos'
+    fast_read = True
+    cached_actions = ('list', 'retrieve')
     serializer_class = ProductoSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -46,13 +98,19 @@ class ProductoViewSet(viewsets.ModelViewSet):
         serializer.save(empresa=self.request.user.empresa)
 
 # 🧾 CRUD de facturas con trazas de error
-class FacturaViewSet(viewsets.ModelViewSet):
+class FacturaViewSet(CachedReadMixin, StreamingListMixin, FastReadMixin, viewsets.ModelViewSet):
     serializer_class = FacturaSerializer
+    fast_read = True
+    cached_actions = ('retrieve',)
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Factura.objects.filter(empresa=self.request.user.empresa)
 
+    def get_stream_queryset(self):
+        # El cliente viene en la misma fila; select_related es compatible con .iterator()
+        return super().get_stream_queryset().select_related('customer')
+
     def perform_create(self, serializer):
         empresa = self.request.user.empresa
         serializer.save(empresa=empresa)
@@ -63,4 +121,42 @@ class FacturaViewSet(viewsets.ModelViewSet):
         except Exception as e:
             print("❌ ERROR AL CREAR FACTURA ❌")
             traceback.print_exc()
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # ⏳ Encola el recálculo de totales fuera del request
+    @action(detail=True, methods=['post'])
+    def recalcular(self, request, pk=None):
+        factura = self.get_object()
+        trabajo = encolar_recalculo_totales(factura.id, priority=10)
+        return Response(
+            {"job_id": trabajo.id, "status": trabajo.status},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+# 🔄 Feed incremental para clientes offline: GET /api/sync/?since=<cursor>
+class SyncView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"detail": "since y limit deben ser enteros"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = cambios_desde(request.user.empresa, since=since, limit=limit, context={'request': request})
+        return Response(data)
+
+# 📊 KPIs del inicio: top clientes, top productos y totales del mes
+class DashboardView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(obtener_dashboard(request.user.empresa.pk))
+
+# 🩺 Diagnóstico interno (solo staff)
+class DiagnosticoView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"response_cache": get_stats(), "database": estadisticas_bd()})
@@ -0,0 +1,56 @@
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Precalentamiento del proceso (gunicorn)
+# -------------------------------
+
+
+def calentar_codigo():
+    """
+    Trabajo que no toca la BD: importar vistas y serializers, poblar el
+    resolver de URLs y construir los campos de los serializers. Con
+    preload_app se hace una sola vez en el master y los workers lo heredan.
+    """
+    from . import views  # noqa: F401
+    from .lectura import get_reader
+    from .serializers import (
+        ClienteSerializer, FacturaSerializer, ProductoSerializer, UsuarioRegistroSerializer,
+    )
+
+    resolver = get_resolver()
+    resolver.reverse_dict  # fuerza _populate()
+    for serializer_class in (ClienteSerializer, ProductoSerializer, FacturaSerializer, UsuarioRegistroSerializer):
+        serializer_class().fields
+    for serializer_class in (ClienteSerializer, ProductoSerializer, FacturaSerializer):
+        get_reader(serializer_class)
+
+
+def calentar_conexiones():
+    """
+    Abre las conexiones a la BD del worker antes del primer request y las
+    suelta enseguida. Con pool, close() la devuelve al pool abierta; si la
+    conserváramos, este hilo (que con gthread no atiende requests) retendría
+    una conexión del pool para siempre.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+        connection.close()
+
+
+def calentar(db=True):
+    start = time.perf_counter()
+    calentar_codigo()
+    if db:
+        try:
+            calentar_conexiones()
+        except Exception:
+            logger.exception("No se pudo abrir la conexión a la BD durante el warm-up")
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info("Warm-up completado en %.0f ms", elapsed)
+    return elapsed
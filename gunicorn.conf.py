@@ -0,0 +1,53 @@
+"""
+Configuración de gunicorn para producción (gunicorn -c gunicorn.conf.py ...).
+
+Los valores se pueden ajustar con variables de entorno sin tocar el archivo.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Workers: WEB_CONCURRENCY manda; si no, 2 × núcleos + 1
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Carga Django una vez en el master y los workers lo heredan por fork
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True") == "True"
+
+# Reciclar workers para contener fugas de memoria; el jitter evita que todos reinicien a la vez
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def when_ready(server):
+    # Con preload_app la app ya está importada: calentamos lo que no depende de la BD
+    if preload_app:
+        from facturas.warmup import calentar
+
+        elapsed = calentar(db=False)
+        server.log.info("Warm-up del master: %.0f ms", elapsed)
+
+
+def pre_fork(server, worker):
+    # Ninguna conexión del master debe heredarse: se cierran antes del fork
+    if preload_app:
+        from django.db import connections
+
+        for connection in connections.all():
+            connection.close()
+
+
+def post_worker_init(worker):
+    from facturas.warmup import calentar
+
+    elapsed = calentar(db=True)
+    worker.log.info("Worker %s listo en %.0f ms", worker.pid, elapsed)